@@ -8,6 +8,7 @@ from services.transcode_service import TranscodeService
 from services.task_service import TaskService
 from services.metadata_service import MediaType
 from services.color_correct_service import ColorCorrectService
+from services.checksum_service import ChecksumService
 from utils.endpoints import tryable_json_endpoint
 from utils.prints import print_out
 
@@ -19,6 +20,7 @@ transcode_service = TranscodeService()
 task_service = TaskService()
 validator_service = ValidatorService()
 color_correct_service = ColorCorrectService()
+checksum_service = ChecksumService()
 
 def str_to_bool(value):
     return value.lower() == 'true'
@@ -31,10 +33,12 @@ def count_media(source_folder_as_encoded_uri_component):
     return ingest_service.count_media(source_folder)
 
 
-@bp.route('/job_data/<int:job_id>', methods=['GET'])
+@bp.route('/job_data/<int:job_id>/items', methods=['GET'])
 @tryable_json_endpoint
-def get_parsed_videos(job_id):
-    return job_service.get_job_data(job_id)
+def get_parsed_media_page(job_id):
+    offset = request.args.get('offset', default=0, type=int)
+    limit = request.args.get('limit', default=500, type=int)
+    return job_service.get_job_data_page(job_id, offset, limit)
 
 
 @bp.route('/parse_images', methods=['POST'])
@@ -222,6 +226,27 @@ def delete_dark_sample_images(job_id):
     return transcode_service.delete_sample_images(job_id, dark_sample_image_dir)
 
 
+@bp.route('/transcode_cache', methods=["GET"])
+@tryable_json_endpoint
+def transcode_cache_stats():
+    return transcode_service.get_transcode_cache_stats()
+
+
+@bp.route('/preview_cache', methods=["GET"])
+@tryable_json_endpoint
+def preview_cache_stats():
+    return transcode_service.get_preview_cache_stats()
+
+
+@bp.route('/verify_originals', methods=["POST"])
+@tryable_json_endpoint
+def verify_originals():
+    payload = request.json
+    folder_path = payload['folder_path']
+    full = payload.get('full', False)
+    return checksum_service.verify_folder(folder_path, full)
+
+
 @bp.route('/delete_old_tasks', methods=["DELETE"])
 @tryable_json_endpoint
 def delete_old_tasks():
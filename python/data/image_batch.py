@@ -0,0 +1,14 @@
+import threading
+from dataclasses import dataclass, field
+
+@dataclass
+class ImageBatch:
+    # Image tasks with the same output settings, converted together by one magick process.
+    # The first task of the batch that runs does the conversion, the others pick up its output
+    jpeg_quality: str
+    is_dark: bool
+    task_ids: list = field(default_factory=list)
+    output_dir: str = ''
+    outputs: dict = field(default_factory=dict)
+    converted: bool = False
+    lock: threading.Lock = field(default_factory=threading.Lock)
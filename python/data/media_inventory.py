@@ -0,0 +1,21 @@
+import time
+from dataclasses import dataclass, field
+
+@dataclass
+class MediaInventory:
+    # Everything found under source_dir by a single walk, in the order os.walk would have found it
+    source_dir: str
+    # (path, lowercased extension) of every file that isn't on the ignore list
+    files: list = field(default_factory=list)
+    images: list = field(default_factory=list)
+    videos: list = field(default_factory=list)
+    # A media file whose path is too long for Windows to open
+    has_unreachable_path: bool = False
+    created_at: float = field(default_factory=time.monotonic)
+
+    def get_files(self, extensions):
+        extensions = set(extensions)
+        return [file_path for file_path, file_extension in self.files if file_extension in extensions]
+
+    def age(self):
+        return time.monotonic() - self.created_at
@@ -0,0 +1,21 @@
+import os
+from dataclasses import dataclass, asdict, field
+
+@dataclass
+class TaskCheckpoint:
+    temp_dir: str = ''
+    # height of the rendition (as a string, since this round-trips through json) -> finished intermediate file
+    rendition_files: dict = field(default_factory=dict)
+    # indexes of the finished chunks, for videos long enough to be encoded in chunks
+    chunks_done: list = field(default_factory=list)
+    temp_dash_container: str = ''
+    dash_packaged: bool = False
+    dash_moved: bool = False
+    original_copied: bool = False
+
+    def is_rendition_done(self, height):
+        rendition_file = self.rendition_files.get(str(height))
+        return bool(rendition_file) and os.path.isfile(rendition_file)
+
+    def to_dict(self):
+        return asdict(self)
@@ -0,0 +1,22 @@
+import threading
+from dataclasses import dataclass, field
+
+from services.metadata_service import MediaType
+
+@dataclass
+class TranscodeJob:
+    # Everything the tasks of one transcode job share while they run, possibly concurrently
+    job_id: int
+    media_type: MediaType
+    source_dir: str
+    report_dir: str
+    optimized_dir_path: str
+    original_dir_path: str
+    local_dir_path: str = ''
+    catalog_folder_id: int = None
+    progress_4_transcode: int = 50
+    progress_4_transfer: int = 50
+    job_deleted: threading.Event = field(default_factory=threading.Event)
+    completion_lock: threading.Lock = field(default_factory=threading.Lock)
+    report_created: bool = False
+    image_batches: dict = field(default_factory=dict)
@@ -4,12 +4,16 @@ from dataclasses import dataclass, asdict
 class TranscodeSettings:
     file_path: str
     input_height: int = 1080
+    input_width: int = 0
     num_frames: int = 1
     output_framerate: int = 30
     jpeg_quality: str = ''
     new_name: str = ''
     is_dark: bool = False
     needs_metadata: bool = False
+    original_checksum: str = ''
+    original_copy_path: str = ''
+    original_date: float = None
 
     def to_dict(self):
         return asdict(self)
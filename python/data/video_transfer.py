@@ -0,0 +1,19 @@
+from dataclasses import dataclass, asdict
+
+@dataclass
+class VideoTransfer:
+    transcode_task_id: int
+    transcode_job_id: int
+    original_file: str
+    temp_dash_container: str
+    output_file_name_mpd: str
+    expected_final_dir: str
+    expected_original_dir: str
+    optimized_dir_path: str
+    catalog_folder_id: int
+    output_framerate: int
+    progress_4_transcode: int
+    progress_4_transfer: int
+
+    def to_dict(self):
+        return asdict(self)
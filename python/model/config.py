@@ -2,3 +2,4 @@ import os
 
 SCHEMA_VERSION = '0030'
 DB_PATH = os.path.join(os.getenv('APPDATA'), 'VITAL', f'vital-{SCHEMA_VERSION}.db')
+CACHE_DIR = os.path.join(os.getenv('APPDATA'), 'VITAL', 'cache')
@@ -0,0 +1,69 @@
+import sqlite3
+import contextlib
+import time
+
+from model.config import DB_PATH
+
+class CacheModel:
+    def __init__(self, db_name=DB_PATH):
+        self.db_name = db_name
+        self.with_cursor("""
+               CREATE TABLE IF NOT EXISTS cache_entry (
+                   namespace TEXT,
+                   cache_key TEXT,
+                   path TEXT,
+                   size INTEGER DEFAULT 0,
+                   last_used REAL,
+                   PRIMARY KEY (namespace, cache_key)
+               )
+           """)
+
+    def make_connection(self):
+        return sqlite3.connect(self.db_name, check_same_thread=False)
+
+    def with_cursor(self, statement, parameters=None, action=None, attr=None):
+        with contextlib.closing(self.make_connection()) as conn: # auto-closes
+            with conn: # auto-commits
+                with contextlib.closing(conn.cursor()) as cursor: # auto-closes
+                    cursor.execute(statement, parameters or ())
+                    if action:
+                        return cursor.__getattribute__(action)()
+                    if attr:
+                        return cursor.__getattribute__(attr)
+
+    def get_entry(self, namespace, cache_key):
+        return self.with_cursor(
+            "SELECT path, size FROM cache_entry WHERE namespace = ? AND cache_key = ?",
+            (namespace, cache_key),
+            action='fetchone'
+        )
+
+    def touch(self, namespace, cache_key):
+        self.with_cursor(
+            "UPDATE cache_entry SET last_used = ? WHERE namespace = ? AND cache_key = ?",
+            (time.time(), namespace, cache_key)
+        )
+
+    def upsert(self, namespace, cache_key, path, size):
+        self.with_cursor(
+            "INSERT OR REPLACE INTO cache_entry (namespace, cache_key, path, size, last_used) VALUES (?, ?, ?, ?, ?)",
+            (namespace, cache_key, path, size, time.time())
+        )
+
+    def delete(self, namespace, cache_key):
+        self.with_cursor("DELETE FROM cache_entry WHERE namespace = ? AND cache_key = ?", (namespace, cache_key))
+
+    def get_total_size(self, namespace):
+        row = self.with_cursor(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_entry WHERE namespace = ?",
+            (namespace,),
+            action='fetchone'
+        )
+        return row[0], row[1]
+
+    def get_least_recently_used(self, namespace, limit=10):
+        return self.with_cursor(
+            "SELECT cache_key, path, size FROM cache_entry WHERE namespace = ? ORDER BY last_used ASC LIMIT ?",
+            (namespace, limit),
+            action='fetchall'
+        )
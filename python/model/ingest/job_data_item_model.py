@@ -0,0 +1,59 @@
+import sqlite3
+import contextlib
+
+from model.config import DB_PATH
+
+class JobDataItemModel:
+    def __init__(self, db_name=DB_PATH):
+        self.db_name = db_name
+        self.with_cursor("""
+               CREATE TABLE IF NOT EXISTS job_data_item (
+                   job_id INTEGER,
+                   position INTEGER,
+                   data TEXT,
+                   PRIMARY KEY (job_id, position)
+               )
+           """)
+
+    def make_connection(self):
+        return sqlite3.connect(self.db_name, check_same_thread=False)
+
+    def with_cursor(self, statement, parameters=None, action=None, attr=None):
+        with contextlib.closing(self.make_connection()) as conn: # auto-closes
+            with conn: # auto-commits
+                with contextlib.closing(conn.cursor()) as cursor: # auto-closes
+                    cursor.execute(statement, parameters or ())
+                    if action:
+                        return cursor.__getattribute__(action)()
+                    if attr:
+                        return cursor.__getattribute__(attr)
+
+    def append(self, job_id, json_items):
+        # Positions continue from the job's last item, inside the same transaction as the insert
+        with contextlib.closing(self.make_connection()) as conn:
+            with conn:
+                with contextlib.closing(conn.cursor()) as cursor:
+                    cursor.execute("SELECT COUNT(*) FROM job_data_item WHERE job_id = ?", (job_id,))
+                    start_position = cursor.fetchone()[0]
+                    cursor.executemany(
+                        "INSERT INTO job_data_item (job_id, position, data) VALUES (?, ?, ?)",
+                        [(job_id, start_position + index, json_item) for index, json_item in enumerate(json_items)]
+                    )
+
+    def get_items(self, job_id, offset=0, limit=None):
+        rows = self.with_cursor(
+            "SELECT data FROM job_data_item WHERE job_id = ? ORDER BY position LIMIT ? OFFSET ?",
+            (job_id, -1 if limit is None else limit, offset),
+            action='fetchall'
+        )
+        return [row[0] for row in rows]
+
+    def count(self, job_id):
+        return self.with_cursor(
+            "SELECT COUNT(*) FROM job_data_item WHERE job_id = ?",
+            (job_id,),
+            action='fetchone'
+        )[0]
+
+    def delete_by_job_id(self, job_id):
+        self.with_cursor("DELETE FROM job_data_item WHERE job_id = ?", (job_id,))
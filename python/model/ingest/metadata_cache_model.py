@@ -0,0 +1,82 @@
+import sqlite3
+import contextlib
+import time
+
+from model.config import DB_PATH
+
+class MetadataCacheModel:
+    # SQLite can bind at most 999 parameters per statement in older builds
+    MAX_PARAMETERS = 900
+
+    def __init__(self, db_name=DB_PATH):
+        self.db_name = db_name
+        self.with_cursor("""
+               CREATE TABLE IF NOT EXISTS metadata_cache (
+                   path TEXT PRIMARY KEY,
+                   size INTEGER,
+                   mtime_ns INTEGER,
+                   version INTEGER,
+                   metadata TEXT,
+                   last_used REAL
+               )
+           """)
+
+    def make_connection(self):
+        return sqlite3.connect(self.db_name, check_same_thread=False)
+
+    def with_cursor(self, statement, parameters=None, action=None, attr=None):
+        with contextlib.closing(self.make_connection()) as conn: # auto-closes
+            with conn: # auto-commits
+                with contextlib.closing(conn.cursor()) as cursor: # auto-closes
+                    cursor.execute(statement, parameters or ())
+                    if action:
+                        return cursor.__getattribute__(action)()
+                    if attr:
+                        return cursor.__getattribute__(attr)
+
+    def get_entries(self, paths):
+        # Returns {path: (size, mtime_ns, version, metadata)} for the paths that have an entry
+        entries = {}
+        for start in range(0, len(paths), self.MAX_PARAMETERS):
+            paths_chunk = paths[start:start + self.MAX_PARAMETERS]
+            rows = self.with_cursor(
+                "SELECT path, size, mtime_ns, version, metadata FROM metadata_cache WHERE path IN (%s)" % ",".join("?" * len(paths_chunk)),
+                paths_chunk,
+                action='fetchall'
+            )
+            for row in rows:
+                entries[row[0]] = row[1:]
+        return entries
+
+    def touch(self, paths):
+        now = time.time()
+        with contextlib.closing(self.make_connection()) as conn:
+            with conn:
+                with contextlib.closing(conn.cursor()) as cursor:
+                    cursor.executemany("UPDATE metadata_cache SET last_used = ? WHERE path = ?", [(now, path) for path in paths])
+
+    def upsert(self, entries):
+        # Writes (path, size, mtime_ns, version, metadata) entries in a single transaction
+        now = time.time()
+        with contextlib.closing(self.make_connection()) as conn:
+            with conn:
+                with contextlib.closing(conn.cursor()) as cursor:
+                    cursor.executemany(
+                        "INSERT OR REPLACE INTO metadata_cache (path, size, mtime_ns, version, metadata, last_used) VALUES (?, ?, ?, ?, ?, ?)",
+                        [(*entry, now) for entry in entries]
+                    )
+
+    def delete_unused_since(self, last_used):
+        return self.with_cursor("DELETE FROM metadata_cache WHERE last_used < ?", (last_used,), attr='rowcount')
+
+    def delete_least_recently_used(self, keep_count):
+        return self.with_cursor(
+            """DELETE FROM metadata_cache WHERE path NOT IN (
+                   SELECT path FROM metadata_cache ORDER BY last_used DESC LIMIT ?
+               )""",
+            (keep_count,),
+            attr='rowcount'
+        )
+
+    def get_count(self):
+        return self.with_cursor("SELECT COUNT(*) FROM metadata_cache", action='fetchone')[0]
@@ -5,6 +5,7 @@ import contextlib
 from model.config import DB_PATH
 from data.transcode_settings import TranscodeSettings
 from data.task import Task, TaskStatus
+from data.task_checkpoint import TaskCheckpoint
 from model.ingest.job_model import JobStatus
 
 class TaskModel:
@@ -21,6 +22,12 @@ class TaskModel:
                    error_message TEXT
                )
            """)
+        self.with_cursor("""
+               CREATE TABLE IF NOT EXISTS task_checkpoint (
+                   task_id INTEGER PRIMARY KEY,
+                   checkpoint TEXT
+               )
+           """)
 
     def make_connection(self):
         return sqlite3.connect(self.db_name, check_same_thread=False)
@@ -102,6 +109,29 @@ class TaskModel:
         params += (task_id,)
         self.with_cursor(query, params)
 
+    def update_tasks_progress(self, progress_updates):
+        # Writes (task_id, progress, message) updates for many tasks in a single transaction
+        with_message = [(progress, message, task_id) for task_id, progress, message in progress_updates if message]
+        without_message = [(progress, task_id) for task_id, progress, message in progress_updates if not message]
+        with contextlib.closing(self.make_connection()) as conn:
+            with conn:
+                with contextlib.closing(conn.cursor()) as cursor:
+                    if without_message:
+                        cursor.executemany("UPDATE task SET progress = ? WHERE id = ?", without_message)
+                    if with_message:
+                        cursor.executemany("UPDATE task SET progress = ?, progress_message = ? WHERE id = ?", with_message)
+
+    def update_tasks_settings(self, settings_updates):
+        # Writes (task_id, transcode_settings) updates for many tasks in a single transaction
+        rows = [
+            (self.serialize_dataclass(transcode_settings), task_id)
+            for task_id, transcode_settings in settings_updates
+        ]
+        with contextlib.closing(self.make_connection()) as conn:
+            with conn:
+                with contextlib.closing(conn.cursor()) as cursor:
+                    cursor.executemany("UPDATE task SET transcode_settings = ? WHERE id = ?", rows)
+
     def update_task_settings(self, task_id: int, transcode_settings: TranscodeSettings):
         transcode_settings_json = self.serialize_dataclass(transcode_settings)
         query = "UPDATE task SET transcode_settings = ? WHERE id = ?"
@@ -111,13 +141,54 @@ class TaskModel:
     def set_task_error_message(self, task_id: int, error_message: str):
         self.with_cursor("UPDATE task SET error_message = ? WHERE id = ?", (error_message, task_id))
 
+    def get_task_checkpoint(self, task_id: int) -> TaskCheckpoint:
+        row = self.with_cursor(
+            "SELECT checkpoint FROM task_checkpoint WHERE task_id = ?",
+            (task_id,),
+            action='fetchone'
+        )
+        if not row:
+            return TaskCheckpoint()
+        return self.deserialize_dataclass(row[0], TaskCheckpoint)
+
+    def set_task_checkpoint(self, task_id: int, checkpoint: TaskCheckpoint):
+        checkpoint_json = self.serialize_dataclass(checkpoint)
+        self.with_cursor(
+            "INSERT OR REPLACE INTO task_checkpoint (task_id, checkpoint) VALUES (?, ?)",
+            (task_id, checkpoint_json)
+        )
+
+    def delete_task_checkpoint(self, task_id: int):
+        self.with_cursor("DELETE FROM task_checkpoint WHERE task_id = ?", (task_id, ))
+
     def delete_by_job_id(self, job_id):
         # Since a Job's Status is derived from it's tasks, start by cleaning up all non-running tasks.
         # Then we will break-and-delete any running tasks within their run loop
+        self.with_cursor(
+            "DELETE FROM task_checkpoint WHERE task_id IN (SELECT id FROM task WHERE job_id = ? AND status != 'INCOMPLETE')",
+            (job_id, )
+        )
         self.with_cursor("DELETE FROM task WHERE job_id = ? AND status != 'INCOMPLETE'", (job_id, ))
 
+    def get_incomplete_task_ids(self):
+        rows = self.with_cursor(
+            "SELECT id FROM task WHERE status = ?",
+            (TaskStatus.INCOMPLETE.value, ),
+            action='fetchall'
+        )
+        return [task_id for (task_id,) in rows]
+
+    def delete_orphaned_checkpoints(self):
+        # A checkpoint is only worth keeping while its task can still be resumed
+        return self.with_cursor(
+            "DELETE FROM task_checkpoint WHERE task_id NOT IN (SELECT id FROM task WHERE status = ?)",
+            (TaskStatus.INCOMPLETE.value, ),
+            attr='rowcount'
+        )
+
     def force_delete(self, task_id):
         self.with_cursor("DELETE FROM task WHERE id = ?", (task_id, ))
+        self.delete_task_checkpoint(task_id)
 
     def delete_old_tasks(self):
         ids_to_delete = self.with_cursor(
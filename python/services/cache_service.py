@@ -0,0 +1,159 @@
+import os
+import errno
+import json
+import shutil
+import hashlib
+import threading
+
+from model.ingest.cache_model import CacheModel
+from utils.prints import print_out, print_err
+
+
+# A size-capped, least-recently-used cache of files and folders on the local disk.
+# Each namespace keeps its own folder, byte budget and hit/miss counters.
+class CacheService:
+
+    # os.link fails with these when the two paths are on different disks, or the disk can't hard link at all
+    LINK_FALLBACK_ERRNOS = {errno.EXDEV, errno.EPERM, errno.EMLINK, errno.EINVAL, errno.ENOTSUP}
+
+    # Counters and the write lock are shared by every instance of the same namespace
+    _stats = {}
+    _write_locks = {}
+    _stats_lock = threading.Lock()
+
+    def __init__(self, namespace, cache_dir, max_bytes):
+        self.namespace = namespace
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.cache_model = CacheModel()
+        with self._stats_lock:
+            self._stats.setdefault(namespace, {'hits': 0, 'misses': 0, 'evictions': 0})
+            self.write_lock = self._write_locks.setdefault(namespace, threading.Lock())
+
+    @staticmethod
+    def make_key(*parts):
+        serialized_parts = json.dumps(parts, sort_keys=True, default=str)
+        return hashlib.sha256(serialized_parts.encode('utf-8')).hexdigest()
+
+    def count(self, counter_name):
+        with self._stats_lock:
+            self._stats[self.namespace][counter_name] += 1
+
+    def get(self, cache_key):
+        entry = self.cache_model.get_entry(self.namespace, cache_key)
+        if entry and os.path.exists(entry[0]):
+            self.cache_model.touch(self.namespace, cache_key)
+            self.count('hits')
+            return entry[0]
+        if entry:
+            # Someone cleaned up the cache folder behind our back
+            self.cache_model.delete(self.namespace, cache_key)
+        self.count('misses')
+        return None
+
+    def contains(self, cache_key):
+        # Unlike get, this does not count as a hit or a miss and does not refresh the entry
+        entry = self.cache_model.get_entry(self.namespace, cache_key)
+        return bool(entry) and os.path.exists(entry[0])
+
+    def put(self, cache_key, source_path):
+        if self.max_bytes <= 0:
+            return None
+
+        file_extension = '' if os.path.isdir(source_path) else os.path.splitext(source_path)[1]
+        entry_path = os.path.join(self.cache_dir, f'{cache_key}{file_extension}')
+        partial_path = f'{entry_path}.partial'
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Link under a temporary name first so that a half-written entry can never be handed out.
+            # Like restore, this only costs a copy when the cache is on another disk than the source
+            if os.path.isdir(source_path):
+                shutil.rmtree(partial_path, ignore_errors=True)
+                shutil.copytree(source_path, partial_path, copy_function=CacheService.link_or_copy)
+            else:
+                CacheService.link_or_copy(source_path, partial_path)
+            entry_size = CacheService.size_of(partial_path)
+
+            with self.write_lock:
+                CacheService.remove_path(entry_path)
+                os.replace(partial_path, entry_path)
+                self.cache_model.upsert(self.namespace, cache_key, entry_path, entry_size)
+                self.evict()
+            return entry_path
+        except Exception as e:
+            # A cache that fails to store an entry should never fail the work that produced it
+            print_err(f'Could not cache {source_path}: {e}')
+            CacheService.remove_path(partial_path)
+            return None
+
+    def restore(self, cached_path, destination_path):
+        # Hard links make restoring free when the cache and the destination share a disk.
+        # Anything that later gets rewritten must be replaced rather than edited in place.
+        # Returns None when the entry was evicted in the meantime, which the caller treats like a miss
+        try:
+            if os.path.isdir(cached_path):
+                shutil.copytree(cached_path, destination_path, copy_function=CacheService.link_or_copy, dirs_exist_ok=True)
+            else:
+                CacheService.link_or_copy(cached_path, destination_path)
+        except (FileNotFoundError, shutil.Error) as e:
+            # copytree gathers the errors of every file it copied into a single shutil.Error
+            if isinstance(e, shutil.Error) and os.path.exists(cached_path):
+                raise
+            print_out(f'{cached_path} left the {self.namespace} cache before it could be restored')
+            CacheService.remove_path(destination_path)
+            self.count('misses')
+            return None
+        return destination_path
+
+    def evict(self):
+        num_entries, total_size = self.cache_model.get_total_size(self.namespace)
+        while total_size > self.max_bytes and num_entries > 0:
+            for cache_key, path, size in self.cache_model.get_least_recently_used(self.namespace):
+                print_out(f'Evicting {path} from the {self.namespace} cache')
+                CacheService.remove_path(path)
+                self.cache_model.delete(self.namespace, cache_key)
+                self.count('evictions')
+                num_entries -= 1
+                total_size -= size
+                if total_size <= self.max_bytes:
+                    break
+
+    def get_stats(self):
+        num_entries, total_size = self.cache_model.get_total_size(self.namespace)
+        with self._stats_lock:
+            stats = dict(self._stats[self.namespace])
+        stats.update({
+            'entries': num_entries,
+            'size': total_size,
+            'max_size': self.max_bytes,
+        })
+        return stats
+
+    @staticmethod
+    def link_or_copy(source_path, destination_path):
+        try:
+            if os.path.exists(destination_path):
+                os.remove(destination_path)
+            os.link(source_path, destination_path)
+        except OSError as e:
+            if e.errno not in CacheService.LINK_FALLBACK_ERRNOS:
+                raise
+            shutil.copyfile(source_path, destination_path)
+        return destination_path
+
+    @staticmethod
+    def size_of(path):
+        if not os.path.isdir(path):
+            return os.path.getsize(path)
+        total_size = 0
+        for dirpath, dirnames, filenames in os.walk(path):
+            for filename in filenames:
+                total_size += os.path.getsize(os.path.join(dirpath, filename))
+        return total_size
+
+    @staticmethod
+    def remove_path(path):
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+        elif os.path.exists(path):
+            os.remove(path)
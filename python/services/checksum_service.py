@@ -0,0 +1,162 @@
+import os
+import json
+import hashlib
+import threading
+from datetime import datetime
+
+from utils.file_path import COPY_CHUNK_BYTES
+from utils.prints import print_out, print_err
+
+
+# Keeps a checksum manifest next to the archived originals of every folder. The checksums are the ones
+# computed while the originals were being copied, so recording them costs no extra read of the source.
+# They are held in memory while their job runs, and each folder's manifest is written once when the job is done.
+# The caller also persists them per task, so a job resumed after a crash can still write the ones it lost.
+# A verification run re-hashes the archived copies and skips the ones that were verified before and have not changed since.
+class ChecksumService:
+
+    MANIFEST_FILE_NAME = 'vital-checksums.json'
+    MANIFEST_VERSION = 1
+    ALGORITHM = 'sha256'
+
+    # A job and a verification run may both update the same manifest, so each manifest has its own lock
+    _folder_locks = {}
+    _folder_locks_lock = threading.Lock()
+
+    # {job_id: {folder_path: {file_name: entry}}} for the originals copied by jobs that are still running
+    _pending_entries = {}
+    _pending_entries_lock = threading.Lock()
+
+    @staticmethod
+    def new_hash():
+        return hashlib.new(ChecksumService.ALGORITHM)
+
+    def get_folder_lock(self, folder_path):
+        folder_key = os.path.normcase(os.path.abspath(folder_path))
+        with self._folder_locks_lock:
+            return self._folder_locks.setdefault(folder_key, threading.Lock())
+
+    def get_manifest_path(self, folder_path):
+        return os.path.join(folder_path, self.MANIFEST_FILE_NAME)
+
+    def read_manifest(self, folder_path):
+        manifest_path = self.get_manifest_path(folder_path)
+        if not os.path.isfile(manifest_path):
+            return {'version': self.MANIFEST_VERSION, 'algorithm': self.ALGORITHM, 'files': {}}
+        with open(manifest_path, 'r', encoding='utf-8') as manifest_file:
+            return json.load(manifest_file)
+
+    def write_manifest(self, folder_path, manifest):
+        manifest_path = self.get_manifest_path(folder_path)
+        partial_path = f'{manifest_path}.partial'
+        with open(partial_path, 'w', encoding='utf-8') as manifest_file:
+            json.dump(manifest, manifest_file, indent=2, sort_keys=True)
+        os.replace(partial_path, manifest_path)
+
+    def make_entry(self, file_path, checksum):
+        file_stat = os.stat(file_path)
+        return {
+            'checksum': checksum,
+            'size': file_stat.st_size,
+            'mtime_ns': file_stat.st_mtime_ns,
+            'recorded': datetime.now().isoformat(timespec='seconds'),
+            'verified': None,
+        }
+
+    def record_checksum(self, job_id, file_path, checksum):
+        # Never raises, a checksum that could not be recorded must not fail the copy it describes
+        folder_path, file_name = os.path.split(file_path)
+        try:
+            entry = self.make_entry(file_path, checksum)
+            with self._pending_entries_lock:
+                job_entries = self._pending_entries.setdefault(job_id, {})
+                job_entries.setdefault(folder_path, {})[file_name] = entry
+        except Exception as e:
+            print_err(f'Failed to record checksum for {file_path}: {e}')
+
+    def write_job_manifests(self, job_id, persisted_checksums=()):
+        # Merges the checksums recorded by a job into the manifest of each folder it copied originals to.
+        # persisted_checksums are (file_path, checksum) pairs the caller kept outside of this process. They cover
+        # copies made before a crash, whose in-memory entries were lost, and are only added when missing from the manifest.
+        # Never raises, for the same reason as record_checksum
+        with self._pending_entries_lock:
+            job_entries = self._pending_entries.pop(job_id, {})
+        persisted_entries = {}
+        for file_path, checksum in persisted_checksums:
+            folder_path, file_name = os.path.split(file_path)
+            if file_name not in job_entries.get(folder_path, {}):
+                persisted_entries.setdefault(folder_path, {})[file_name] = (file_path, checksum)
+
+        for folder_path in set(job_entries) | set(persisted_entries):
+            folder_entries = job_entries.get(folder_path, {})
+            try:
+                with self.get_folder_lock(folder_path):
+                    manifest = self.read_manifest(folder_path)
+                    manifest['files'].update(folder_entries)
+                    num_recovered = 0
+                    for file_name, (file_path, checksum) in persisted_entries.get(folder_path, {}).items():
+                        manifest_entry = manifest['files'].get(file_name)
+                        if manifest_entry and manifest_entry['checksum'] == checksum:
+                            continue
+                        try:
+                            manifest['files'][file_name] = self.make_entry(file_path, checksum)
+                            num_recovered += 1
+                        except OSError as e:
+                            print_err(f'Failed to record checksum for {file_path}: {e}')
+                    if folder_entries or num_recovered:
+                        self.write_manifest(folder_path, manifest)
+                if folder_entries or num_recovered:
+                    print_out(f'Recorded {len(folder_entries) + num_recovered} checksums in {self.get_manifest_path(folder_path)}')
+            except Exception as e:
+                print_err(f'Failed to write the checksum manifest of {folder_path}: {e}')
+
+    def hash_file(self, file_path):
+        file_hash = self.new_hash()
+        buffer = bytearray(COPY_CHUNK_BYTES)
+        with open(file_path, 'rb') as file_handle:
+            while True:
+                num_read = file_handle.readinto(buffer)
+                if not num_read:
+                    break
+                file_hash.update(memoryview(buffer)[:num_read])
+        return file_hash.hexdigest()
+
+    def verify_folder(self, folder_path, full=False):
+        # Unless full is set, files that already passed and still have the same size and mtime are not read again
+        with self.get_folder_lock(folder_path):
+            manifest = self.read_manifest(folder_path)
+        result = {'verified': [], 'skipped': [], 'mismatched': [], 'missing': []}
+
+        for file_name, entry in manifest['files'].items():
+            file_path = os.path.join(folder_path, file_name)
+            if not os.path.isfile(file_path):
+                result['missing'].append(file_name)
+                continue
+            file_stat = os.stat(file_path)
+            unchanged = file_stat.st_size == entry['size'] and file_stat.st_mtime_ns == entry['mtime_ns']
+            if not full and unchanged and entry.get('verified'):
+                result['skipped'].append(file_name)
+                continue
+            if file_stat.st_size == entry['size'] and self.hash_file(file_path) == entry['checksum']:
+                result['verified'].append(file_name)
+                entry['verified'] = datetime.now().isoformat(timespec='seconds')
+                entry['mtime_ns'] = file_stat.st_mtime_ns
+            else:
+                result['mismatched'].append(file_name)
+                entry['verified'] = None
+
+        # Entries recorded while this run was hashing are merged in rather than overwritten
+        with self.get_folder_lock(folder_path):
+            latest_manifest = self.read_manifest(folder_path)
+            for file_name, entry in manifest['files'].items():
+                latest_entry = latest_manifest['files'].get(file_name)
+                if latest_entry and latest_entry['checksum'] == entry['checksum']:
+                    latest_entry['verified'] = entry['verified']
+                    latest_entry['mtime_ns'] = entry['mtime_ns']
+            self.write_manifest(folder_path, latest_manifest)
+
+        print_out(
+            f'Verified {folder_path}: {len(result["verified"])} ok, {len(result["skipped"])} skipped, '
+            f'{len(result["mismatched"])} mismatched, {len(result["missing"])} missing'
+        )
+        return result
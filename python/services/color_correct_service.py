@@ -1,19 +1,28 @@
 import os
 import sys
+import tempfile
 import threading
 from typing import List
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+try:
+    import numpy as np
+except ImportError:
+    # Without NumPy and Pillow, dark images are identified one magick process at a time
+    np = None
 
 from data.transcode_settings import TranscodeSettings
 from services.job_service import JobService
 from services.task_service import TaskService
 from services.metadata_service import MediaType
 from services.transcode_service import TranscodeService
+from services.image_engine import PillowImageEngine
 from model.ingest.job_model import JobType, JobStatus
 
 from settings.settings_service import SettingsService, SettingsEnum
 from data.task import TaskStatus
 
-from utils.prints import print_err
+from utils.prints import print_out, print_err
 from utils.transcode_snippets import auto_exposure_correct
 
 
@@ -24,6 +33,16 @@ class ColorCorrectService:
 
     TEMP_DIRNAME = 'temp-dark'
 
+    # When True, and NumPy is available, darkness is measured in-process instead of by a magick process per image.
+    # test/benchmark_dark_classifier.py compares both. Its in-process median stays within
+    # DARK_IDENTIFY_RECHECK_MARGIN of the exact one, and any image whose in-process median lands that close
+    # to the threshold is measured again by magick. That way both paths mark the same images dark
+    BATCH_DARK_IDENTIFY = True
+    DARK_IDENTIFY_RECHECK_MARGIN = 0.01
+
+    # Bump this whenever generate_exposure_correct_command or its input changes, so cached dark previews stop being used
+    DARK_PREVIEW_VERSION = 2
+
     def __init__(self):
         self.job_service = JobService()
         self.task_service = TaskService()
@@ -51,6 +70,11 @@ class ColorCorrectService:
 
     def run_dark_identify_tasks(self, job_id):
         tasks = self.task_service.get_tasks_by_job_id(job_id)
+        if self.BATCH_DARK_IDENTIFY and np is not None and PillowImageEngine.is_available():
+            self.run_dark_identify_batch(job_id, tasks)
+            self.job_service.set_job_status(job_id)
+            return
+
         for task in tasks:
             try:
                 self.dark_identify_image(task.id)
@@ -64,18 +88,109 @@ class ColorCorrectService:
                 raise err
         self.job_service.set_job_status(job_id)
 
+    def run_dark_identify_batch(self, job_id, tasks):
+        # Images are decoded in a worker pool, their medians come out of one NumPy pass over all their
+        # histograms, and every is_dark flag is written in a single transaction
+        settings_by_task_id = {task.id: self.task_service.get_transcode_settings(task.id) for task in tasks}
+        histograms = {}
+        medians = {}
+        first_error = None
+        with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as executor:
+            futures = {
+                executor.submit(self.analyze_darkness, transcode_settings.file_path): task_id
+                for task_id, transcode_settings in settings_by_task_id.items()
+            }
+            for future in as_completed(futures):
+                task_id = futures[future]
+                try:
+                    result = future.result()
+                except Exception as err:
+                    print_err(f'Error identifying dark image {settings_by_task_id[task_id].file_path}: {err}')
+                    first_error = first_error or err
+                    continue
+                if isinstance(result, float):
+                    medians[task_id] = result
+                else:
+                    histograms[task_id] = result
+                self.task_service.set_task_progress(task_id, 100)
+
+        if histograms:
+            medians.update(zip(histograms.keys(), self.medians_from_histograms(list(histograms.values()))))
+            recheck_task_ids = [
+                task_id for task_id in histograms
+                if abs(medians[task_id] - self.DARK_IMAGE_THRESHOLD) < self.DARK_IDENTIFY_RECHECK_MARGIN
+            ]
+            if recheck_task_ids:
+                print_out(f'Measuring {len(recheck_task_ids)} images close to the dark threshold again with magick')
+                with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as executor:
+                    recheck_futures = {
+                        executor.submit(self.identify_median, settings_by_task_id[task_id].file_path): task_id
+                        for task_id in recheck_task_ids
+                    }
+                    for future in as_completed(recheck_futures):
+                        task_id = recheck_futures[future]
+                        try:
+                            medians[task_id] = future.result()
+                        except Exception as err:
+                            print_err(f'Error identifying dark image {settings_by_task_id[task_id].file_path}: {err}')
+                            first_error = first_error or err
+                            del medians[task_id]
+
+        dark_settings_updates = []
+        for task_id, image_median in medians.items():
+            if image_median <= self.DARK_IMAGE_THRESHOLD:
+                transcode_settings = settings_by_task_id[task_id]
+                transcode_settings.is_dark = True
+                dark_settings_updates.append((task_id, transcode_settings))
+        self.task_service.set_tasks_settings(dark_settings_updates)
+        for task_id in medians:
+            self.task_service.set_task_status(task_id, TaskStatus.COMPLETED)
+
+        if first_error:
+            # Even a single task error renders the whole job corrupt, so we
+            # push it to the job level, can cancel the job
+            print_err(f"Error identifying dark images")
+            self.job_service.set_error(job_id, f'{first_error.__class__.__name__}: {first_error}')
+            raise first_error
+
+    def analyze_darkness(self, file_path):
+        # Returns a 256 bin histogram of the image's gray values, or the exact median
+        # from magick for anything Pillow can't decode the way magick would
+        with tempfile.TemporaryDirectory() as temp_dir:
+            analysis_source = self.transcode_service.image_metadata_service.get_fast_preview_source(file_path, temp_dir)
+            try:
+                return self.compute_gray_histogram(analysis_source)
+            except Exception as e:
+                print_err(f'Falling back to magick to identify {file_path}: {e}')
+                return self.identify_median_with_magick(analysis_source)
+
+    def compute_gray_histogram(self, file_path):
+        pillow_image_engine = PillowImageEngine()
+        with pillow_image_engine.open(file_path) as image:
+            return pillow_image_engine.gray_histogram(image)
+
+    @staticmethod
+    def medians_from_histograms(histograms):
+        return PillowImageEngine.medians_from_histograms(histograms)
+
     def dark_identify_image(self, task_id):
         transcode_settings = self.task_service.get_transcode_settings(task_id)
-        file_path = transcode_settings.file_path
+        image_median = self.identify_median(transcode_settings.file_path)
+        if image_median <= self.DARK_IMAGE_THRESHOLD:
+            transcode_settings.is_dark = True
+            self.task_service.set_task_settings(task_id, transcode_settings)
+
+    def identify_median(self, file_path):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            analysis_source = self.transcode_service.image_metadata_service.get_fast_preview_source(file_path, temp_dir)
+            return self.identify_median_with_magick(analysis_source)
 
+    def identify_median_with_magick(self, file_path):
         command = self.generate_dark_identify_command(file_path)
         output = TranscodeService.run_command_with_terminator(command)
         # parse the output from imagemagick
         clean_output = output.strip().strip('"')
-        image_median = float(clean_output)
-        if image_median <= self.DARK_IMAGE_THRESHOLD:
-            transcode_settings.is_dark = True
-            self.task_service.set_task_settings(task_id, transcode_settings)
+        return float(clean_output)
 
     def generate_dark_identify_command(self, input_path):
         return [
@@ -126,8 +241,31 @@ class ColorCorrectService:
         transcode_settings = self.task_service.get_transcode_settings(task_id)
         input_path = transcode_settings.file_path
         output_path = os.path.join(temp_dir, transcode_settings.new_name)
-        command = self.generate_exposure_correct_command(input_path, output_path)
-        TranscodeService.run_command_with_terminator(command)
+        # Remove rather than overwrite, the old file may be a hard link into the preview cache
+        if os.path.exists(output_path):
+            os.remove(output_path)
+
+        preview_cache = self.transcode_service.get_preview_cache()
+        image_metadata_service = self.transcode_service.image_metadata_service
+        preview_source_kind = image_metadata_service.get_preview_source_kind(input_path)
+        cache_key = self.transcode_service.make_preview_cache_key(
+            preview_cache, input_path, 'dark_preview', self.DARK_PREVIEW_VERSION, preview_source_kind
+        )
+        cached_preview = preview_cache.get(cache_key) if cache_key else None
+        if cached_preview and preview_cache.restore(cached_preview, output_path):
+            return
+
+        with tempfile.TemporaryDirectory() as preview_temp_dir:
+            preview_source = image_metadata_service.get_fast_preview_source(
+                input_path,
+                preview_temp_dir,
+                copy_orientation=True
+            )
+            command = self.generate_exposure_correct_command(preview_source, output_path)
+            TranscodeService.run_command_with_terminator(command)
+        # A RAW without a usable embedded preview was decoded in full, which its cache key does not describe
+        if cache_key and image_metadata_service.get_preview_source_kind(input_path, preview_source) == preview_source_kind:
+            preview_cache.put(cache_key, output_path)
 
     def generate_exposure_correct_command(self, input_path, output_path):
         return [
@@ -0,0 +1,140 @@
+import os
+import queue
+import subprocess
+import threading
+from subprocess import PIPE
+
+from utils.prints import print_out, print_err
+
+
+# Keeps one exiftool running in -stay_open mode, so a request costs a round trip through its pipes instead of
+# starting the Perl interpreter again. exiftool works on one request at a time, so requests are serialized.
+# It exits by itself once its stdin closes, which happens when this process goes away.
+# Both of its outputs are drained by their own threads, so neither pipe can fill up and stall it
+class ExiftoolService:
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    READ_CHUNK_BYTES = 64 * 1024
+    STOP_TIMEOUT_SEC = 5
+    # A request fails once exiftool has printed nothing to either output for this long
+    REQUEST_TIMEOUT_SEC = 120
+
+    def __new__(cls, exiftool_path):
+        with cls._instances_lock:
+            if exiftool_path not in cls._instances:
+                instance = super(ExiftoolService, cls).__new__(cls)
+                instance.exiftool_path = exiftool_path
+                instance.lock = threading.Lock()
+                instance.process = None
+                instance.output_queue = None
+                instance.request_number = 0
+                cls._instances[exiftool_path] = instance
+        return cls._instances[exiftool_path]
+
+    def execute(self, args):
+        # Returns stdout as bytes and stderr as a string, like communicate() on a one-off exiftool would
+        with self.lock:
+            try:
+                return self.run_request(args)
+            except TimeoutError as e:
+                # Not retried, the same request would most likely hang the fresh exiftool as well
+                print_err(f'exiftool timed out, restarting it: {e}')
+                self.start_process()
+                raise
+            except (OSError, EOFError) as e:
+                # exiftool crashed or was killed, a fresh one gets the request once more
+                print_err(f'exiftool stopped responding, restarting it: {e}')
+                self.stop_process()
+                return self.run_request(args)
+
+    def stop(self):
+        with self.lock:
+            self.stop_process()
+
+    def run_request(self, args):
+        if not self.process or self.process.poll() is not None:
+            self.start_process()
+
+        self.request_number += 1
+        ready_marker = f'{{ready{self.request_number}}}'
+        # -executeN ends the request, and has exiftool print {readyN} to stdout once it's done.
+        # -echo4 prints the same marker to stderr after the request's own errors
+        request_args = [*args, '-echo4', ready_marker, f'-execute{self.request_number}']
+        request = ''.join(f'{arg}\n' for arg in request_args).encode('utf-8')
+        try:
+            self.process.stdin.write(request)
+            self.process.stdin.flush()
+            stdout, stderr = self.read_response(ready_marker.encode())
+        except TimeoutError:
+            # A hung exiftool won't act on -stay_open False either
+            self.stop_process(kill=True)
+            raise
+        except BaseException:
+            # Whatever was left unread would be taken for the answer to the next request
+            self.stop_process()
+            raise
+        return stdout, stderr.decode('utf-8', errors='replace').strip()
+
+    def read_response(self, marker):
+        # Returns stdout and stderr once both end with the marker, which is on a line of its own, \r\n terminated on Windows
+        endings = (marker + b'\r\n', marker + b'\n')
+        outputs = {'stdout': bytearray(), 'stderr': bytearray()}
+        responses = {}
+        while len(responses) < len(outputs):
+            try:
+                stream_name, chunk = self.output_queue.get(timeout=self.REQUEST_TIMEOUT_SEC)
+            except queue.Empty:
+                raise TimeoutError(f'No output for {self.REQUEST_TIMEOUT_SEC} seconds')
+            if not chunk:
+                raise EOFError('exiftool closed its output')
+            output = outputs[stream_name]
+            output.extend(chunk)
+            for ending in endings:
+                if output.endswith(ending):
+                    responses[stream_name] = bytes(output[:-len(ending)])
+                    break
+        return responses['stdout'], responses['stderr']
+
+    @staticmethod
+    def drain_output(stream, stream_name, output_queue, chunk_bytes):
+        # Runs until the process closes the stream, an empty chunk tells the reader it did
+        while True:
+            try:
+                chunk = os.read(stream.fileno(), chunk_bytes)
+            except OSError:
+                chunk = b''
+            output_queue.put((stream_name, chunk))
+            if not chunk:
+                return
+
+    def start_process(self):
+        # File names are passed through the argument pipe as UTF-8, which exiftool must be told about on Windows
+        command = [self.exiftool_path, '-stay_open', 'True', '-@', '-', '-common_args', '-charset', 'filename=utf8']
+        print_out(' '.join(command))
+        self.process = subprocess.Popen(command, stdin=PIPE, stdout=PIPE, stderr=PIPE)
+        # Each process gets its own queue, so nothing a previous one printed can be mistaken for its output
+        self.output_queue = queue.Queue()
+        for stream_name, stream in (('stdout', self.process.stdout), ('stderr', self.process.stderr)):
+            threading.Thread(
+                target=ExiftoolService.drain_output,
+                args=(stream, stream_name, self.output_queue, self.READ_CHUNK_BYTES),
+                daemon=True,
+            ).start()
+
+    def stop_process(self, kill=False):
+        if not self.process:
+            return
+        process = self.process
+        self.process = None
+        if not kill:
+            try:
+                if process.poll() is None:
+                    process.stdin.write(b'-stay_open\nFalse\n')
+                    process.stdin.flush()
+                    process.wait(timeout=self.STOP_TIMEOUT_SEC)
+                return
+            except (OSError, subprocess.TimeoutExpired):
+                pass
+        process.kill()
+        process.wait()
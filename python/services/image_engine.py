@@ -0,0 +1,165 @@
+import os
+import math
+from abc import ABC, abstractmethod
+from datetime import datetime
+
+try:
+    from PIL import Image, ImageOps, ImageStat
+except ImportError:
+    # Without Pillow every image goes through ImageMagick, like it always did
+    Image = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from utils.transcode_snippets import auto_exposure_correct
+
+
+# An image engine turns one source image into optimized JPEGs at one or more qualities,
+# applying the auto exposure correction when the image was found to be dark
+class ImageEngine(ABC):
+    name = ''
+
+    def supports(self, input_path):
+        return False
+
+    @abstractmethod
+    def convert_variants(self, input_path, variants, is_dark):
+        # variants is a list of (output_path, jpeg_quality), all encoded from a single decode of the input
+        pass
+
+
+class MagickImageEngine(ImageEngine):
+    name = 'magick'
+
+    def __init__(self, magick_path, run_command):
+        self.magick_path = magick_path
+        self.run_command = run_command
+
+    def supports(self, input_path):
+        return True
+
+    def convert_variants(self, input_path, variants, is_dark):
+        self.run_command(self.generate_variants_command(input_path, variants, is_dark))
+
+    def generate_variants_command(self, input_path, variants, is_dark):
+        # -quality is only a setting, so one decoded image can be written once per quality with -write
+        command = [
+            self.magick_path,
+            input_path,
+        ]
+        if is_dark:
+            command.extend(auto_exposure_correct)
+        for output_path, jpeg_quality in variants[:-1]:
+            command.extend(['-quality', f'{jpeg_quality}', '-write', output_path])
+        last_output_path, last_jpeg_quality = variants[-1]
+        command.extend(['-quality', f'{last_jpeg_quality}', last_output_path])
+        return command
+
+
+class PillowImageEngine(ImageEngine):
+    # Decodes and encodes in-process, which saves a magick process and its codec setup for every image.
+    # Only formats Pillow decodes the same way magick does are handled here, RAW files and the rest go to magick
+    name = 'pillow'
+    EXTENSIONS = {'.jpg', '.jpeg', '.jpe', '.png', '.tif', '.tiff'}
+    MODES = {'RGB', 'RGBA', 'L', 'LA', 'P', 'CMYK'}
+
+    # Same percentages as the -contrast-stretch in auto_exposure_correct: black point, white point
+    CONTRAST_STRETCH_CUTOFF = (0.05, 0.01)
+
+    # Below this quality magick subsamples the chroma 2x2, at or above it keeps full chroma
+    FULL_CHROMA_MIN_QUALITY = 90
+
+    # The channels are weighed like magick's -colorspace gray does (Rec. 709 luma) for the darkness measurement
+    GRAY_WEIGHTS = (0.2126, 0.7152, 0.0722)
+
+    EXIF_IFD_POINTER = 0x8769
+    EXIF_DATE_TIME_ORIGINAL = 0x9003
+
+    @staticmethod
+    def is_available():
+        return Image is not None
+
+    def supports(self, input_path):
+        return PillowImageEngine.is_available() and os.path.splitext(input_path)[1].lower() in self.EXTENSIONS
+
+    def convert_variants(self, input_path, variants, is_dark):
+        with self.open(input_path) as image:
+            self.save_variants(image, variants, is_dark)
+
+    def open(self, input_path):
+        # Only the header is read here, the pixels are decoded on first use
+        return Image.open(input_path)
+
+    def save_variants(self, image, variants, is_dark):
+        if image.mode not in self.MODES:
+            # e.g. 16-bit or float images, which Pillow would flatten differently than magick
+            raise ValueError(f'Unsupported image mode for {self.name}: {image.mode}')
+        icc_profile = image.info.get('icc_profile')
+        # Only an EXIF block the source actually carries is copied, never one rebuilt from e.g. TIFF tags
+        exif = image.info.get('exif')
+
+        converted = image.convert('CMYK' if image.mode == 'CMYK' else 'RGB')
+        if is_dark:
+            converted = self.auto_exposure_correct(converted)
+
+        for output_path, jpeg_quality in variants:
+            jpeg_quality = int(jpeg_quality)
+            save_options = {
+                'quality': jpeg_quality,
+                'subsampling': 0 if jpeg_quality >= self.FULL_CHROMA_MIN_QUALITY else 2,
+            }
+            if icc_profile:
+                save_options['icc_profile'] = icc_profile
+            if exif:
+                save_options['exif'] = exif
+            converted.save(output_path, 'JPEG', **save_options)
+
+    def read_original_date(self, image):
+        # Same DateTimeOriginal that exiftool reports, as a timestamp, read from the EXIF sub-IFD and never from IFD0.
+        # None when it is missing or the file is not one of EXTENSIONS, e.g. a TIFF-based RAW whose first IFD
+        # describes its thumbnail. Callers then have to ask exiftool
+        if not self.supports(getattr(image, 'filename', '') or ''):
+            return None
+        original_date = image.getexif().get_ifd(self.EXIF_IFD_POINTER).get(self.EXIF_DATE_TIME_ORIGINAL)
+        if not original_date:
+            return None
+        try:
+            return datetime.strptime(str(original_date).strip('\x00 '), '%Y:%m:%d %H:%M:%S').timestamp()
+        except ValueError:
+            return None
+
+    def gray_histogram(self, image):
+        # A 256 bin histogram of the gray values of every pixel at full resolution, image itself is left as it is.
+        # Nothing is downsampled, an averaging decode or resample would pull the median away from the one magick measures
+        if image.mode not in self.MODES:
+            raise ValueError(f'Unsupported image mode for {self.name}: {image.mode}')
+        rgb_image = image if image.mode == 'RGB' else image.convert('RGB')
+        gray_image = rgb_image.convert('L', (*self.GRAY_WEIGHTS, 0))
+        return np.array(gray_image.histogram())
+
+    @staticmethod
+    def medians_from_histograms(histograms):
+        # Pillow rounds every gray value to a whole bin while magick keeps it exact. Spreading each bin's pixels
+        # evenly over the half step on either side of it puts the median within the bin instead of on its center
+        stacked = np.stack(histograms)
+        cumulative = np.cumsum(stacked, axis=1)
+        halfway = cumulative[:, -1] / 2
+        median_bins = np.argmax(cumulative >= halfway[:, None], axis=1)
+        rows = np.arange(len(stacked))
+        below_bin = cumulative[rows, median_bins] - stacked[rows, median_bins]
+        within_bin = (halfway - below_bin) / np.maximum(stacked[rows, median_bins], 1)
+        return np.clip((median_bins - 0.5 + within_bin) / 255, 0, 1).tolist()
+
+    def auto_exposure_correct(self, image):
+        # -auto-gamma: a single gamma for all channels that moves the mean to the middle of the range
+        channel_means = ImageStat.Stat(image).mean
+        mean = sum(channel_means) / len(channel_means) / 255
+        if 0 < mean < 1:
+            gamma = math.log(mean) / math.log(0.5)
+            lookup = [round(255 * ((value / 255) ** (1 / gamma))) for value in range(256)]
+            image = image.point(lookup * len(image.getbands()))
+        # -contrast-stretch: clip the darkest and brightest pixels, then stretch what's left to the full range
+        return ImageOps.autocontrast(image, cutoff=self.CONTRAST_STRETCH_CUTOFF, preserve_tone=True)
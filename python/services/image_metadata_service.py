@@ -1,28 +1,60 @@
 import os
 import sys
-import subprocess
 import json
 from datetime import datetime
 
 from services.metadata_service import MetadataService
+from services.exiftool_service import ExiftoolService
+from services.metadata_cache_service import MetadataCacheService
 from data.media_medatadata import MediaMetadata
 
 from utils.prints import print_out, print_err
+from utils.constants import raw_image_extensions
 
 class ImageMetadataService(MetadataService):
 
+    # Embedded JPEGs that RAW files carry, from the largest to the smallest
+    EMBEDDED_PREVIEW_TAGS = ['JpgFromRaw', 'PreviewImage', 'OtherImage']
+    JPEG_START_OF_IMAGE = b'\xff\xd8'
+
+    # What a preview was made from, which its cache key has to include: a RAW's embedded JPEG or a full decode
+    PREVIEW_SOURCE_EMBEDDED = 'embedded'
+    PREVIEW_SOURCE_FULL = 'full'
+
     def __init__(self):
         base_dir = os.path.dirname(os.path.abspath(sys.argv[0]))
         self.exiftool_path = os.path.join(base_dir, 'resources', 'exiftool.exe')
         if not os.path.isfile(self.exiftool_path):
             print_err(f"exiftool.exe does not exist at {self.exiftool_path}")
             raise FileNotFoundError(f"exiftool.exe does not exist at {self.exiftool_path}")
+        self.exiftool = ExiftoolService(self.exiftool_path)
+        self.metadata_cache_service = MetadataCacheService()
 
     def parse_metadata(self, files):
-        command = [self.exiftool_path, "-j"] + files
-        print_out(" ".join(command))
-        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        metadata_json, error = process.communicate()
+        # Same order as files, with exiftool only asked about the files the cache doesn't know
+        normalized_files = [os.path.normpath(file_path) for file_path in files]
+        cached_metadata = self.metadata_cache_service.lookup(normalized_files)
+        uncached_files = [
+            file_path for file_path, normalized_file in zip(files, normalized_files)
+            if normalized_file not in cached_metadata
+        ]
+        parsed_metadata = {}
+        if uncached_files:
+            metadata_arr = self.run_exiftool(uncached_files)
+            self.metadata_cache_service.store(metadata_arr)
+            parsed_metadata = {metadata.file_path: metadata for metadata in metadata_arr}
+
+        metadata_arr = []
+        for normalized_file in normalized_files:
+            metadata = cached_metadata.get(normalized_file) or parsed_metadata.get(normalized_file)
+            if metadata:
+                metadata_arr.append(metadata)
+        return metadata_arr
+
+    def run_exiftool(self, files):
+        args = ["-j"] + files
+        print_out(" ".join([self.exiftool_path] + args))
+        metadata_json, error = self.exiftool.execute(args)
 
         if error:
             print_err(f"exiftool stderr: {error}")
@@ -53,3 +85,37 @@ class ImageMetadataService(MetadataService):
                 frame_rate=None
             ))
         return metadata_arr
+
+    def extract_embedded_preview(self, file_path, output_path, copy_orientation=False):
+        # Returns output_path, or None if the file carries no usable preview
+        for tag in self.EMBEDDED_PREVIEW_TAGS:
+            preview, _ = self.exiftool.execute(['-b', f'-{tag}', file_path])
+            if not preview.startswith(self.JPEG_START_OF_IMAGE):
+                continue
+            with open(output_path, 'wb') as output_file:
+                output_file.write(preview)
+            if copy_orientation:
+                # Previews are stored unrotated, the RAW's orientation tells viewers how to show them
+                self.exiftool.execute(['-q', '-overwrite_original', '-TagsFromFile', file_path, '-Orientation', output_path])
+            return output_path
+        return None
+
+    def get_preview_source_kind(self, file_path, preview_source=None):
+        # The kind get_fast_preview_source will hand out for file_path, or did hand out when preview_source is given
+        if preview_source is not None and preview_source == file_path:
+            return self.PREVIEW_SOURCE_FULL
+        if os.path.splitext(file_path)[1].lower() in raw_image_extensions:
+            return self.PREVIEW_SOURCE_EMBEDDED
+        return self.PREVIEW_SOURCE_FULL
+
+    def get_fast_preview_source(self, file_path, temp_dir, copy_orientation=False):
+        # For analysis and previews, a RAW's embedded JPEG stands in for a full demosaic of the RAW.
+        # Anything else, or a RAW without a preview, is used as is. The archival transcode never uses this
+        if os.path.splitext(file_path)[1].lower() not in raw_image_extensions:
+            return file_path
+        output_path = os.path.join(temp_dir, f'{os.path.basename(file_path)}.preview.jpg')
+        try:
+            return self.extract_embedded_preview(file_path, output_path, copy_orientation) or file_path
+        except Exception as e:
+            print_err(f'Could not extract the embedded preview of {file_path}: {e}')
+            return file_path
@@ -1,10 +1,12 @@
 import os
 import threading
 import json
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 from datetime import datetime
 
 
+from data.media_inventory import MediaInventory
 from services.job_service import JobService
 from services.task_service import TaskService
 from services.validator_service import ValidatorService
@@ -33,7 +35,20 @@ class IngestService:
         'desktop.ini',
         'thumbs.db',
     ]
+    IGNORE_PREFIXES = tuple(IGNORE_LIST)
+    IMAGE_EXTENSIONS = set(image_extensions)
+    VIDEO_EXTENSIONS = set(video_extensions)
+    # Shorter paths were just listed, so only these can fail to open
+    WINDOWS_MAX_PATH = 260
+    # A counted folder is usually parsed or queued right after, which then reuses its inventory instead of walking it again
+    INVENTORY_TTL_SEC = 60
+    _inventories = {}
+    _inventories_lock = threading.Lock()
+
     IMAGE_PARSE_BATCH_SIZE = 100
+    # ffprobe mostly waits on the share or the card reader, so a few of them run per core, up to this many
+    VIDEO_PARSES_PER_CORE = 2
+    MAX_VIDEO_PARSE_CONCURRENCY = 8
 
     def __init__(self):
         self.job_service = JobService()
@@ -56,74 +71,131 @@ class IngestService:
             target_extensions = image_extensions if media_type == MediaType.IMAGE else video_extensions
             files = self.get_files(source_dir, target_extensions)
 
-            metadata_arr = []
+            # Results are validated and stored batch by batch, so the first pages can be read while parsing goes on
+            num_parsed = 0
             if (media_type == MediaType.IMAGE):
                 for i in range(0, len(files), self.IMAGE_PARSE_BATCH_SIZE):
                     metadata_for_batch = self.image_metadata_service.parse_metadata(
                         files[i:i+self.IMAGE_PARSE_BATCH_SIZE]
                     )
-                    metadata_arr.extend(metadata_for_batch)
+                    self.store_parse_results(job_id, source_dir, observer_code, media_type, metadata_for_batch)
+                    num_parsed += len(metadata_for_batch)
             else:
-                for file_path in files:
-                    media_metadata = self.video_metadata_service.parse_metadata(file_path)
-                    if not media_metadata:
-                        continue
-                    metadata_arr.append(media_metadata)
-                if len(metadata_arr) != len(files):
-                    raise ValueError(f'Could not parse all metadata. Found {len(files)} files but could only parse {len(metadata_arr)}.')
-
-            validated_metadata = []
-            for metadata in metadata_arr:
-                validation_status = self.validator_service.validate_media(source_dir, observer_code, metadata, media_type)
-                metadata.validation_status = validation_status
-                validated_metadata.append(metadata.to_dict())
-
-            self.job_service.store_job_data(job_id, validated_metadata)
+                metadata_for_batch = []
+                video_parse_concurrency = self.get_video_parse_concurrency()
+                with ThreadPoolExecutor(max_workers=video_parse_concurrency) as executor:
+                    # map hands the results back in the order of files
+                    for media_metadata in executor.map(self.video_metadata_service.parse_metadata, files):
+                        if not media_metadata:
+                            continue
+                        metadata_for_batch.append(media_metadata)
+                        if len(metadata_for_batch) == video_parse_concurrency:
+                            self.store_parse_results(job_id, source_dir, observer_code, media_type, metadata_for_batch)
+                            num_parsed += len(metadata_for_batch)
+                            metadata_for_batch = []
+                self.store_parse_results(job_id, source_dir, observer_code, media_type, metadata_for_batch)
+                num_parsed += len(metadata_for_batch)
+                if num_parsed != len(files):
+                    raise ValueError(f'Could not parse all metadata. Found {len(files)} files but could only parse {num_parsed}.')
+
+            self.job_service.store_job_data(job_id, {"item_count": num_parsed})
         except Exception as err:
             print_err(f"Error parsing media")
             self.job_service.set_error(job_id, f'{err.__class__.__name__}: {err}')
             raise err
 
 
-    def get_files(self, source_dir, extensions):
-        found_files = []
-        for root, dirs, filenames in os.walk(source_dir):
-            for filename in filenames:
-                # Ignore special/hidden files
-                if any([filename.lower().startswith(ignore) for ignore in self.IGNORE_LIST]):
-                    continue
-                file_extension = os.path.splitext(filename)[1]
-                if file_extension:
-                    file_extension = file_extension.lower()
-                if file_extension in extensions:
-                    found_files.append(os.path.join(root, filename))
+    def get_video_parse_concurrency(self):
+        return min(self.MAX_VIDEO_PARSE_CONCURRENCY, (os.cpu_count() or 1) * self.VIDEO_PARSES_PER_CORE)
 
-        return found_files
+    def store_parse_results(self, job_id, source_dir, observer_code, media_type, metadata_arr):
+        validated_metadata = []
+        for metadata in metadata_arr:
+            validation_status = self.validator_service.validate_media(source_dir, observer_code, metadata, media_type)
+            metadata.validation_status = validation_status
+            validated_metadata.append(metadata.to_dict())
+        if validated_metadata:
+            self.job_service.append_job_data_items(job_id, validated_metadata)
 
 
-    def count_media(self, source_dir):
-        video_file_paths = self.get_files(source_dir, video_extensions)
-        video_files_count = len(video_file_paths)
-        image_file_paths = self.get_files(source_dir, image_extensions)
-        image_files_count = len(image_file_paths)
+    def get_files(self, source_dir, extensions):
+        return self.get_inventory(source_dir).get_files(extensions)
+
+
+    def get_inventory(self, source_dir, max_age_sec=INVENTORY_TTL_SEC):
+        inventory_key = os.path.normcase(os.path.abspath(source_dir))
+        with self._inventories_lock:
+            inventory = self._inventories.get(inventory_key)
+        if inventory and inventory.age() <= max_age_sec:
+            return inventory
+
+        inventory = self.build_inventory(source_dir)
+        with self._inventories_lock:
+            for expired_key in [key for key, cached in self._inventories.items() if cached.age() > self.INVENTORY_TTL_SEC]:
+                del self._inventories[expired_key]
+            self._inventories[inventory_key] = inventory
+        return inventory
+
+
+    def build_inventory(self, source_dir):
+        # Walks the tree once with scandir, whose entries already know whether they are folders
+        inventory = MediaInventory(source_dir)
+        directories = [source_dir]
+        while directories:
+            directory = directories.pop()
+            subdirectories = []
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        try:
+                            is_dir = entry.is_dir()
+                        except OSError:
+                            is_dir = False
+                        if is_dir:
+                            # Like os.walk, symlinked folders are not followed
+                            if not entry.is_symlink():
+                                subdirectories.append(entry.path)
+                            continue
+                        self.add_to_inventory(inventory, entry)
+            except OSError as e:
+                print_err(f'Could not list {directory}: {e}')
+                continue
+            # Pushed in reverse so subfolders are visited in listing order, after the files of their parent
+            directories.extend(reversed(subdirectories))
+        return inventory
+
+
+    def add_to_inventory(self, inventory, entry):
+        # Ignore special/hidden files
+        if entry.name.lower().startswith(self.IGNORE_PREFIXES):
+            return
+        file_extension = os.path.splitext(entry.name)[1].lower()
+        inventory.files.append((entry.path, file_extension))
+        if file_extension in self.IMAGE_EXTENSIONS:
+            inventory.images.append(entry.path)
+        elif file_extension in self.VIDEO_EXTENSIONS:
+            inventory.videos.append(entry.path)
+        else:
+            return
+        if len(entry.path) >= self.WINDOWS_MAX_PATH and not os.path.exists(entry.path):
+            inventory.has_unreachable_path = True
+
 
-        all_paths = []
-        all_paths.extend(video_file_paths)
-        all_paths.extend(image_file_paths)
+    def count_media(self, source_dir):
+        # Always walked again, the counts are what the user decides on
+        inventory = self.get_inventory(source_dir, max_age_sec=0)
 
         error = None
-        for file_path in all_paths:
-            if not os.path.exists(file_path):
-                error = ValidatorService.WINDOWS_MAX_PATH_LENGTH_ERROR
-                break
+        if inventory.has_unreachable_path:
+            error = ValidatorService.WINDOWS_MAX_PATH_LENGTH_ERROR
 
         invalid_path = self.validator_service.validate_year_for_source(source_dir)
         if invalid_path:
             error = f'A required year folder does not exist:\n{invalid_path}'
 
         return {
-            'images': image_files_count,
-            'videos': video_files_count,
+            'images': len(inventory.images),
+            'videos': len(inventory.videos),
             'error': error,
         }
 
@@ -1,6 +1,7 @@
 import json
 
 from model.ingest.job_model import JobModel, JobType, JobStatus
+from model.ingest.job_data_item_model import JobDataItemModel
 from services.task_service import TaskService
 from model.ingest.task_model import TaskStatus
 from data.report import Report
@@ -10,6 +11,7 @@ from utils.death import terminate_all
 class JobService:
     def __init__(self):
         self.job_model = JobModel()
+        self.job_data_item_model = JobDataItemModel()
         self.task_service = TaskService()
 
     def create_job(self, job_type: JobType, job_status: JobStatus, data=None):
@@ -23,6 +25,23 @@ class JobService:
     def get_job_data(self, job_id):
         return json.loads(self.job_model.get_data(job_id))
 
+    def append_job_data_items(self, job_id, items):
+        self.job_data_item_model.append(job_id, [json.dumps(item) for item in items])
+
+    def get_job_data_items(self, job_id, offset=0, limit=None):
+        return [json.loads(item) for item in self.job_data_item_model.get_items(job_id, offset, limit)]
+
+    def get_job_data_page(self, job_id, offset, limit):
+        # Can be polled while the job is still adding items, total only counts the items added so far
+        status, error = self.check_job_status(job_id)
+        return {
+            "items": self.get_job_data_items(job_id, offset, limit),
+            "offset": offset,
+            "total": self.job_data_item_model.count(job_id),
+            "status": status,
+            "error": error,
+        }
+
     def get_job(self, job_id):
         return self.job_model.get_job(job_id)
 
@@ -59,6 +78,7 @@ class JobService:
             terminate_all()
 
         orphaned_tasks = self.task_service.delete_by_job_id(job_id)
+        self.job_data_item_model.delete_by_job_id(job_id)
         self.job_model.delete(job_id)
 
         return orphaned_tasks
@@ -81,3 +101,4 @@ class JobService:
 
         for job in all_old_jobs:
             self.job_model.archive(job['id'])
+            self.job_data_item_model.delete_by_job_id(job['id'])
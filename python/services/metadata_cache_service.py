@@ -0,0 +1,102 @@
+import os
+import json
+import time
+import threading
+from dataclasses import asdict
+
+from data.media_medatadata import MediaMetadata
+from model.ingest.metadata_cache_model import MetadataCacheModel
+from utils.prints import print_out, print_err
+
+
+# Remembers what exiftool and ffprobe found in a file, for as long as the file keeps its size and modification time.
+# Shared by the image and video metadata services, which only run their tool for the files it doesn't know yet
+class MetadataCacheService:
+
+    # Bump this whenever the metadata services change what they parse, so entries parsed the old way stop being used
+    METADATA_CACHE_VERSION = 1
+
+    MAX_ENTRIES = 200000
+    MAX_UNUSED_DAYS = 90
+    # Eviction scans the whole table, so it runs at most this often
+    EVICTION_INTERVAL_SEC = 60 * 60
+
+    _last_eviction = 0
+    _eviction_lock = threading.Lock()
+
+    def __init__(self):
+        self.metadata_cache_model = MetadataCacheModel()
+
+    @staticmethod
+    def normalize_path(file_path):
+        return os.path.normcase(os.path.abspath(file_path))
+
+    def lookup(self, file_paths):
+        # Returns {file_path: MediaMetadata} for the given files that are cached and unchanged since
+        try:
+            file_stats = {}
+            for file_path in file_paths:
+                try:
+                    file_stats[file_path] = os.stat(file_path)
+                except OSError:
+                    continue
+            cache_keys = {file_path: MetadataCacheService.normalize_path(file_path) for file_path in file_stats}
+            entries = self.metadata_cache_model.get_entries(list(set(cache_keys.values())))
+
+            cached_metadata = {}
+            for file_path, file_stat in file_stats.items():
+                entry = entries.get(cache_keys[file_path])
+                if not entry:
+                    continue
+                size, mtime_ns, version, metadata_json = entry
+                if size != file_stat.st_size or mtime_ns != file_stat.st_mtime_ns or version != self.METADATA_CACHE_VERSION:
+                    continue
+                metadata = MediaMetadata(**json.loads(metadata_json))
+                # Only what the tool found inside the file comes from the cache, the rest is as the file is now
+                metadata.file_name = os.path.basename(file_path)
+                metadata.file_path = file_path
+                metadata.size = file_stat.st_size
+                metadata.created_date = file_stat.st_ctime
+                metadata.modified_date = file_stat.st_mtime
+                cached_metadata[file_path] = metadata
+
+            if cached_metadata:
+                self.metadata_cache_model.touch([cache_keys[file_path] for file_path in cached_metadata])
+                print_out(f'Metadata cache: {len(cached_metadata)} of {len(file_paths)} files found')
+            return cached_metadata
+        except Exception as e:
+            # A broken cache only costs the tool runs it would have saved
+            print_err(f'Could not read the metadata cache: {e}')
+            return {}
+
+    def store(self, metadata_list):
+        try:
+            entries = []
+            for metadata in metadata_list:
+                file_stat = os.stat(metadata.file_path)
+                metadata_dict = asdict(metadata)
+                # Validation depends on the job, not on the file
+                metadata_dict['validation_status'] = None
+                entries.append((
+                    MetadataCacheService.normalize_path(metadata.file_path),
+                    file_stat.st_size,
+                    file_stat.st_mtime_ns,
+                    self.METADATA_CACHE_VERSION,
+                    json.dumps(metadata_dict),
+                ))
+            if entries:
+                self.metadata_cache_model.upsert(entries)
+            self.evict()
+        except Exception as e:
+            print_err(f'Could not update the metadata cache: {e}')
+
+    def evict(self, force=False):
+        with self._eviction_lock:
+            if not force and time.time() - MetadataCacheService._last_eviction < self.EVICTION_INTERVAL_SEC:
+                return
+            MetadataCacheService._last_eviction = time.time()
+        num_deleted = self.metadata_cache_model.delete_unused_since(time.time() - self.MAX_UNUSED_DAYS * 24 * 60 * 60)
+        if self.metadata_cache_model.get_count() > self.MAX_ENTRIES:
+            num_deleted += self.metadata_cache_model.delete_least_recently_used(self.MAX_ENTRIES)
+        if num_deleted:
+            print_out(f'Evicted {num_deleted} entries from the metadata cache')
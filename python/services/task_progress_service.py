@@ -0,0 +1,74 @@
+import time
+import threading
+
+from model.ingest.task_model import TaskModel
+from utils.prints import print_err
+
+
+# Progress updates are collected in memory and written in the background. A task's progress is only written
+# when it actually changed, at most once per flush interval, and every task's pending update shares one transaction.
+class TaskProgressService:
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    FLUSH_INTERVAL_SEC = 0.5
+
+    def __new__(cls):
+        with cls._instance_lock:
+            if cls._instance is None:
+                instance = super(TaskProgressService, cls).__new__(cls)
+                instance.task_model = TaskModel()
+                instance.lock = threading.Lock()
+                instance.flush_lock = threading.Lock()
+                instance.dirty = threading.Event()
+                instance.pending = {}
+                instance.last_written = {}
+                instance.flusher = threading.Thread(target=instance.run_flusher, daemon=True)
+                instance.flusher.start()
+                cls._instance = instance
+        return cls._instance
+
+    def set_progress(self, task_id: int, progress: int, message: str = ''):
+        with self.lock:
+            last_progress, last_message = self.pending.get(task_id) or self.last_written.get(task_id, (None, ''))
+            if progress == last_progress and (not message or message == last_message):
+                return
+            pending_message = message
+            if not pending_message and task_id in self.pending:
+                # A message that is still waiting to be written must not be lost by a later progress-only update
+                pending_message = self.pending[task_id][1]
+            self.pending[task_id] = (progress, pending_message)
+        self.dirty.set()
+
+    def run_flusher(self):
+        while True:
+            self.dirty.wait()
+            # Give the updates of every running task a moment to pile up so they go out together
+            time.sleep(self.FLUSH_INTERVAL_SEC)
+            self.dirty.clear()
+            self.flush()
+
+    def flush(self):
+        # The flush lock keeps two writers from reordering updates of the same task
+        with self.flush_lock:
+            with self.lock:
+                if not self.pending:
+                    return
+                updates = self.pending
+                self.pending = {}
+            try:
+                self.task_model.update_tasks_progress([
+                    (task_id, progress, message)
+                    for task_id, (progress, message) in updates.items()
+                ])
+            except Exception as e:
+                print_err(f'Failed to write task progress: {e}')
+                return
+            with self.lock:
+                for task_id, (progress, message) in updates.items():
+                    _, last_message = self.last_written.get(task_id, (None, ''))
+                    self.last_written[task_id] = (progress, message or last_message)
+
+    def forget(self, task_id: int):
+        with self.lock:
+            self.last_written.pop(task_id, None)
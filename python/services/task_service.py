@@ -1,15 +1,24 @@
+import os
 import json
+import shutil
+import tempfile
 
 from model.ingest.task_model import TaskModel
 from data.transcode_settings import TranscodeSettings
 from data.task import TaskStatus
+from data.task_checkpoint import TaskCheckpoint
 from model.ingest.job_model import JobModel
 from services.metadata_service import MediaType
+from services.task_progress_service import TaskProgressService
 
 class TaskService:
+    TEMP_TASK_DIRNAME = 'vital-transcode'
+    TEMP_TASK_DIR_PREFIX = 'task-'
+
     def __init__(self):
         self.task_model = TaskModel()
         self.job_model = JobModel()
+        self.task_progress_service = TaskProgressService()
 
 
     def create_task(self, job_id: int, transcode_settings: TranscodeSettings) -> int:
@@ -71,22 +80,63 @@ class TaskService:
         return self.task_model.get_all_task_ids_by_status(job_id, status)
 
     def set_task_status(self, task_id: int, status: TaskStatus):
+        # Progress that is still buffered must land before the status that follows it
+        self.task_progress_service.flush()
+        self.task_progress_service.forget(task_id)
         self.task_model.update_task_status(task_id, status)
 
     def set_task_progress(self, task_id: int, progress: int, message: str = ''):
-        self.task_model.update_task_progress(task_id, progress, message)
+        self.task_progress_service.set_progress(task_id, progress, message)
 
     def set_task_settings(self, task_id: int, transcode_settings: TranscodeSettings):
         self.task_model.update_task_settings(task_id, transcode_settings)
 
+    def set_tasks_settings(self, settings_updates):
+        self.task_model.update_tasks_settings(settings_updates)
+
     def set_task_error_message(self, task_id: int, error_message: str):
         self.task_model.set_task_error_message(task_id, error_message)
 
+    def get_task_checkpoint(self, task_id: int) -> TaskCheckpoint:
+        return self.task_model.get_task_checkpoint(task_id)
+
+    def set_task_checkpoint(self, task_id: int, checkpoint: TaskCheckpoint):
+        self.task_model.set_task_checkpoint(task_id, checkpoint)
+
+    def delete_task_checkpoint(self, task_id: int):
+        self.task_model.delete_task_checkpoint(task_id)
+
+    def get_task_temp_root(self):
+        return os.path.join(tempfile.gettempdir(), self.TEMP_TASK_DIRNAME)
+
+    def get_task_temp_dir_path(self, task_id: int):
+        return os.path.join(self.get_task_temp_root(), f'{self.TEMP_TASK_DIR_PREFIX}{task_id}')
+
     def delete_by_job_id(self, job_id):
         orphaned_tasks = self.task_model.get_tasks_by_job_id(job_id)
         self.task_model.delete_by_job_id(job_id)
+        # Running tasks remove their own temp dir once they notice the job is gone
+        for task in orphaned_tasks:
+            if task.status != TaskStatus.INCOMPLETE.value:
+                shutil.rmtree(self.get_task_temp_dir_path(task.id), ignore_errors=True)
         return orphaned_tasks
 
+    def delete_orphaned_checkpoints(self):
+        # Removes the checkpoints and temp dirs of video tasks that can no longer be resumed, e.g. after a crash.
+        # SQLite can hand a deleted task's id to a new task, so nothing of the old task may be left behind for it
+        live_task_ids = set(self.task_model.get_incomplete_task_ids())
+        self.task_model.delete_orphaned_checkpoints()
+        task_temp_root = self.get_task_temp_root()
+        if not os.path.isdir(task_temp_root):
+            return
+        for entry in os.scandir(task_temp_root):
+            if not entry.name.startswith(self.TEMP_TASK_DIR_PREFIX):
+                continue
+            task_id = entry.name[len(self.TEMP_TASK_DIR_PREFIX):]
+            if task_id.isdigit() and int(task_id) in live_task_ids:
+                continue
+            shutil.rmtree(entry.path, ignore_errors=True)
+
     def force_delete(self, task_id):
         self.task_model.force_delete(task_id)
 
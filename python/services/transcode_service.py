@@ -1,5 +1,7 @@
 import io
 import os
+import contextlib
+import math
 import errno
 import sys
 import re
@@ -8,10 +10,16 @@ import shutil
 import subprocess
 import time
 import threading
+import queue
 from subprocess import PIPE
 from typing import List
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from data.transcode_settings import TranscodeSettings
+from data.transcode_job import TranscodeJob
+from data.video_transfer import VideoTransfer
+from data.task_checkpoint import TaskCheckpoint
+from data.image_batch import ImageBatch
 from data.task import TaskProgessMessages
 from services.job_service import JobService
 from services.task_service import TaskService
@@ -20,6 +28,10 @@ from services.report_service import ReportService
 from services.ingest_service import IngestService
 from services.image_metadata_service import ImageMetadataService
 from services.video_metadata_service import VideoMetadataService
+from services.cache_service import CacheService
+from services.checksum_service import ChecksumService
+from services.image_engine import MagickImageEngine, PillowImageEngine
+from model.config import CACHE_DIR
 from model.ingest.job_model import JobType, JobStatus, JobErrors
 
 from settings.settings_service import SettingsService, SettingsEnum
@@ -34,11 +46,16 @@ from utils.file_path import (
     make_one_dir_ok_exists,
     get_size_of_folder_contents_recursively,
     copy_file_with_attempts,
+    copy_file_fanout,
+    copy_file_chunked,
+    copy_folder_chunked,
+    CopyProgress,
+    fingerprint_file,
     RETRY_DELAY_SEC
 )
 from utils.prints import print_out, print_err
 from utils.numbers import find_closest, determine_bucket_for_resolution
-from utils.death import add_terminator, remove_last_terminator
+from utils.death import add_terminator, remove_terminator
 from utils.constants import image_extensions, video_extensions
 from utils.transcode_snippets import auto_exposure_correct
 
@@ -60,6 +77,45 @@ class TranscodeService:
     }
     PROGRESS_RATIOS = [12, 4, 2, 1]
 
+    # When True, a single ffmpeg process decodes the source once and encodes every rendition of the
+    # ladder from that one decode. When False, each rendition is encoded by its own ffmpeg process
+    SINGLE_DECODE_LADDER = True
+
+    # When True, ffmpeg writes the DASH segments and manifest itself, so no intermediate renditions are written
+    # and MP4Box never runs. The MP4Box path is still used for chunked encodes, for resuming partly finished
+    # ladders, and as a fallback whenever the direct encode fails
+    DIRECT_DASH_OUTPUT = True
+    # Which program packaged a DASH output. Their file layouts differ, so cached outputs are kept apart by packager
+    DASH_PACKAGER_FFMPEG = 'ffmpeg'
+    DASH_PACKAGER_MP4BOX = 'mp4box'
+    DASH_SEGMENT_DURATION_SEC = 4
+
+    # Used to derive the default number of video tasks that run at once from the number of cores
+    CPU_CORES_PER_VIDEO_TASK = 4
+
+    # When True, network transfers of finished videos overlap with the encoding of the next videos.
+    # The queue size is how many encoded videos may wait for their transfer at once
+    PIPELINE_VIDEO_TRANSFERS = True
+    TRANSFER_QUEUE_SIZE = 2
+
+    # How many files of one DASH folder are uploaded to the optimized directory at once,
+    # unless the transfer_concurrency setting says otherwise
+    DEFAULT_TRANSFER_CONCURRENCY = 4
+
+    # Videos at least this long are encoded as concurrent chunks. Each chunk is this many GOPs long
+    CHUNKED_ENCODE_MIN_DURATION_SEC = 20 * 60
+    CHUNK_DURATION_GOPS = 150
+    catalog_lock = threading.Lock()
+
+    # Videos of every job that are encoding right now. Chunked encodes share the video cores with them
+    active_video_encodes = 0
+    active_video_encodes_lock = threading.Lock()
+
+    # Tasks of a job that are retrying on a missing output folder. The job's FILE_NOT_FOUND error stays up
+    # until every one of them got past it, so concurrent tasks can't clear each other's error
+    file_not_found_task_ids = {}
+    file_not_found_lock = threading.Lock()
+
     # Define a ratio of total progress for the transcodes versus the transfers, based on transfer bandwidth speeds
     #  Mbps: (Transcode Progress Amount, Transfer Progress Amount)
     TRNSC_2_TRNSFR_PRGS_RATIOS = {
@@ -87,6 +143,27 @@ class TranscodeService:
         MAX_JPEG_QUALITY,
     ]
 
+    # When True, image tasks with the same output settings are converted in batches by a single magick process
+    BATCH_IMAGE_CONVERSION = True
+    IMAGE_BATCH_SIZE = 25
+
+    # When True, common formats like JPEG, PNG and TIFF are converted in-process by Pillow (when installed),
+    # inside the task's own worker thread. Everything else still goes through magick
+    IN_PROCESS_IMAGE_ENGINE = True
+
+    # When True, images that still need their metadata and that the in-process engine handles get their
+    # dimensions, date and optimized JPEG from one read and decode of the source. Darkness is not measured
+    # here, is_dark was settled by ColorCorrectService before the transcode job was created
+    SINGLE_PASS_IMAGE_PIPELINE = True
+
+    # Bump this whenever the encoder settings change, so that outputs cached with the old settings stop being used
+    TRANSCODE_CACHE_VERSION = 1
+    DEFAULT_TRANSCODE_CACHE_SIZE_GB = 20
+
+    # Sample and dark previews are kept in the thumbnail directory, keyed by their source file and settings
+    PREVIEW_CACHE_DIRNAME = 'preview-cache'
+    DEFAULT_PREVIEW_CACHE_SIZE_MB = 512
+
     TEMP_SAMPLE_DIR = 'temp'
 
     def __init__(self):
@@ -99,12 +176,25 @@ class TranscodeService:
         self.ingest_service = IngestService()
         self.image_metadata_service = ImageMetadataService()
         self.video_metadata_service = VideoMetadataService()
+        self.checksum_service = ChecksumService()
+        self.transcode_cache = CacheService(
+            'transcode',
+            os.path.join(CACHE_DIR, 'transcode'),
+            self.get_transcode_cache_size()
+        )
 
         base_dir = os.path.dirname(os.path.abspath(sys.argv[0]))
         self.ffmpeg_path = os.path.join(base_dir, 'resources', 'ffmpeg.exe')
         self.mp4box_path = os.path.join(base_dir, 'resources', 'mp4box.exe')
         self.magick_path = os.path.join(base_dir, 'resources', 'magick.exe')
 
+        # Engines are tried in order, magick comes last since it can convert anything the others can't
+        self.image_engines = [
+            MagickImageEngine(self.magick_path, lambda command: TranscodeService.run_command_with_terminator(command))
+        ]
+        if self.IN_PROCESS_IMAGE_ENGINE and PillowImageEngine.is_available():
+            self.image_engines.insert(0, PillowImageEngine())
+
     def queue_transcode_job(
             self,
             source_dir: str,
@@ -206,30 +296,64 @@ class TranscodeService:
         temp_sample_dir = self.get_sample_image_dir()
         os.makedirs(temp_sample_dir, exist_ok=True)
 
+        # Every quality of one source image is written from a single decode of it,
+        # and the few source images of a preview are converted at the same time
+        tasks_by_source = {}
         for task in tasks:
-            transcode_task_id = task.id
-            try:
-                transcode_settings = self.task_service.get_transcode_settings(transcode_task_id)
-                new_name = transcode_settings.new_name
+            transcode_settings = self.task_service.get_transcode_settings(task.id)
+            tasks_by_source.setdefault(transcode_settings.file_path, []).append((task.id, transcode_settings))
 
-                _, output_file_path = self.run_transcode_commands(temp_sample_dir, transcode_settings)
-                final_output_path = os.path.join(temp_sample_dir, new_name)
-
-                if os.path.exists(final_output_path):
-                    os.remove(final_output_path)
-                os.rename(output_file_path, final_output_path)
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, len(tasks_by_source))) as executor:
+                futures = [
+                    executor.submit(self.run_sample_tasks_for_source, file_path, source_tasks, temp_sample_dir)
+                    for file_path, source_tasks in tasks_by_source.items()
+                ]
+                for future in futures:
+                    future.result()
+        except Exception as err:
+            # Even a single task error renders the whole job corrupt, so we catch
+            # this one error, push it to the job level, can cancel the job
+            print_err(f"Error creating sample images")
+            self.job_service.set_error(job_id, f'{err.__class__.__name__}: {err}')
+            raise err
 
-                self.task_service.set_task_progress(transcode_task_id, 100)
-                self.task_service.set_task_status(transcode_task_id, TaskStatus.COMPLETED)
+        self.job_service.set_job_status(job_id)
 
-            except Exception as err:
-                # Even a single task error renders the whole job corrupt, so we catch
-                # this one error, push it to the job level, can cancel the job
-                print_err(f"Error creating sample images")
-                self.job_service.set_error(job_id, f'{err.__class__.__name__}: {err}')
-                raise err
+    def run_sample_tasks_for_source(self, file_path, source_tasks, temp_sample_dir):
+        file_extension = os.path.splitext(file_path)[1]
+        if file_extension.lower() not in image_extensions:
+            raise ValueError(f'Unsupported image file type: {file_extension}')
 
-        self.job_service.set_job_status(job_id)
+        is_dark = source_tasks[0][1].is_dark
+        preview_cache = self.get_preview_cache()
+        preview_source_kind = self.image_metadata_service.get_preview_source_kind(file_path)
+        variants = []
+        for _, transcode_settings in source_tasks:
+            final_output_path = os.path.join(temp_sample_dir, transcode_settings.new_name)
+            # Remove rather than overwrite, the old file may be a hard link into the preview cache
+            if os.path.exists(final_output_path):
+                os.remove(final_output_path)
+            cache_key = self.make_preview_cache_key(
+                preview_cache, file_path, 'sample', preview_source_kind, transcode_settings.jpeg_quality, is_dark
+            )
+            cached_sample = preview_cache.get(cache_key) if cache_key else None
+            if not cached_sample or not preview_cache.restore(cached_sample, final_output_path):
+                variants.append((final_output_path, transcode_settings.jpeg_quality, cache_key))
+
+        if variants:
+            with tempfile.TemporaryDirectory() as preview_temp_dir:
+                preview_source = self.image_metadata_service.get_fast_preview_source(file_path, preview_temp_dir, copy_orientation=True)
+                self.convert_image_variants(preview_source, [variant[:2] for variant in variants], is_dark)
+            # A RAW without a usable embedded preview was decoded in full, which its cache key does not describe
+            made_from_kind = self.image_metadata_service.get_preview_source_kind(file_path, preview_source)
+            for final_output_path, _, cache_key in variants:
+                if cache_key and made_from_kind == preview_source_kind:
+                    preview_cache.put(cache_key, final_output_path)
+
+        for transcode_task_id, _ in source_tasks:
+            self.task_service.set_task_progress(transcode_task_id, 100)
+            self.task_service.set_task_status(transcode_task_id, TaskStatus.COMPLETED)
 
     def delete_sample_images(self, job_id, temp_sample_dir):
         if not os.path.exists(temp_sample_dir):
@@ -290,11 +414,12 @@ class TranscodeService:
             try:
                 make_one_dir_ok_exists(optimized_dir_path)
                 make_one_dir_ok_exists(original_dir_path)
+                self.clear_file_not_found(transcode_job_id, None)
             except FileNotFoundError as e:
                 # See the task loop for more details on this retry logic
                 retry_job = True
                 print_err(str(e))
-                self.job_service.set_error(transcode_job_id, JobErrors.FILE_NOT_FOUND)
+                self.set_file_not_found(transcode_job_id, None)
                 self.job_service.set_job_status(transcode_job_id)
                 time.sleep(RETRY_DELAY_SEC)
             finally:
@@ -313,71 +438,294 @@ class TranscodeService:
             disk_bandwidth = 10 # this will give us a perfectly balanced 50/50 since we failed to identify the bandwidth
         progress_4_transcode, progress_4_transfer = TranscodeService.get_subtask_progress_ratios(disk_bandwidth)
 
-        break_task_loop = False
-        for transcode_task_id in transcode_task_ids:
-            if break_task_loop:
+        transcode_job = TranscodeJob(
+            job_id=transcode_job_id,
+            media_type=media_type,
+            source_dir=source_dir,
+            report_dir=report_dir,
+            optimized_dir_path=optimized_dir_path,
+            original_dir_path=original_dir_path,
+            local_dir_path=local_dir_path,
+            catalog_folder_id=catalog_folder_id,
+            progress_4_transcode=progress_4_transcode,
+            progress_4_transfer=progress_4_transfer,
+        )
+
+        max_workers = self.get_task_concurrency(media_type)
+        print_out(f'Running up to {max_workers} tasks at once for job {transcode_job_id}')
+
+        if media_type == MediaType.VIDEO and self.PIPELINE_VIDEO_TRANSFERS:
+            try:
+                self.run_video_pipeline(transcode_job, transcode_task_ids, max_workers)
+            finally:
+                self.write_job_manifests(transcode_job_id)
+            return
+
+        if media_type == MediaType.IMAGE and self.BATCH_IMAGE_CONVERSION:
+            transcode_task_ids = self.plan_image_batches(transcode_job, transcode_task_ids, max_workers)
+
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = [
+                    executor.submit(self.run_transcode_task, transcode_job, transcode_task_id)
+                    for transcode_task_id in transcode_task_ids
+                ]
+                for future in futures:
+                    future.result()
+        finally:
+            self.clear_image_batches(transcode_job)
+            self.write_job_manifests(transcode_job_id)
+
+    def get_task_concurrency(self, media_type):
+        configured_concurrency = self.settings_service.get_setting(SettingsEnum.TRANSCODE_CONCURRENCY.value)
+        if configured_concurrency:
+            try:
+                return max(1, int(configured_concurrency))
+            except ValueError:
+                print_err(f'Ignoring invalid {SettingsEnum.TRANSCODE_CONCURRENCY.value} setting: {configured_concurrency}')
+
+        cpu_count = os.cpu_count() or 1
+        if media_type == MediaType.VIDEO:
+            # libx264 already spreads one encode across several cores, so we run fewer videos at once
+            return max(1, cpu_count // self.CPU_CORES_PER_VIDEO_TASK)
+        return cpu_count
+
+    def run_transcode_task(self, transcode_job: TranscodeJob, transcode_task_id):
+        if transcode_job.job_deleted.is_set():
+            return
+
+        if (transcode_job.media_type == MediaType.VIDEO):
+            temp_dir = self.get_task_temp_dir(transcode_task_id)
+            try:
+                self.run_task_stage(transcode_job, transcode_task_id, lambda: self.transcode_video(
+                    transcode_job.source_dir,
+                    transcode_job.optimized_dir_path,
+                    transcode_job.original_dir_path,
+                    transcode_job.catalog_folder_id,
+                    transcode_task_id,
+                    transcode_job.job_id,
+                    temp_dir,
+                    transcode_job.progress_4_transcode,
+                    transcode_job.progress_4_transfer
+                ))
+            finally:
+                self.clear_task_checkpoint(transcode_task_id, temp_dir)
+            return
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            self.run_task_stage(transcode_job, transcode_task_id, lambda: self.transcode_image(
+                transcode_job.optimized_dir_path,
+                transcode_job.original_dir_path,
+                transcode_job.local_dir_path,
+                transcode_task_id,
+                transcode_job.job_id,
+                temp_dir,
+                transcode_job.image_batches.get(transcode_task_id)
+            ))
+
+    def get_task_temp_dir(self, transcode_task_id):
+        # Video tasks keep their temp outputs in a stable location rather than a random one, so that
+        # their checkpoint can still be resumed from after a retry, or by a later run of the queue
+        task_temp_dir = self.task_service.get_task_temp_dir_path(transcode_task_id)
+        os.makedirs(task_temp_dir, exist_ok=True)
+        return task_temp_dir
+
+    def clear_task_checkpoint(self, transcode_task_id, temp_dir):
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        self.task_service.delete_task_checkpoint(transcode_task_id)
+
+    def run_video_pipeline(self, transcode_job: TranscodeJob, transcode_task_ids, max_workers):
+        # The encode stage runs in the worker pool and hands every finished DASH package to a separate
+        # transfer stage, so the next video is already encoding while the previous one copies to the network.
+        # The queue is bounded so that encodes can't run too far ahead and fill up the temp disk.
+        transfer_queue = queue.Queue(maxsize=self.TRANSFER_QUEUE_SIZE)
+        transfer_errors = []
+        transfer_thread = threading.Thread(
+            target=self.run_video_transfers,
+            args=(transcode_job, transfer_queue, transfer_errors)
+        )
+        transfer_thread.start()
+
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = [
+                    executor.submit(self.run_video_encode, transcode_job, transcode_task_id, transfer_queue)
+                    for transcode_task_id in transcode_task_ids
+                ]
+                for future in futures:
+                    future.result()
+        finally:
+            transfer_queue.put(None)
+            transfer_thread.join()
+
+        if transfer_errors:
+            raise transfer_errors[0]
+
+    def run_video_encode(self, transcode_job: TranscodeJob, transcode_task_id, transfer_queue):
+        if transcode_job.job_deleted.is_set():
+            return
+
+        # This temp dir outlives the encode stage, the transfer stage removes it once it is done with it
+        temp_dir = self.get_task_temp_dir(transcode_task_id)
+        video_transfers = []
+        encoded = self.run_task_stage(
+            transcode_job,
+            transcode_task_id,
+            lambda: video_transfers.append(self.encode_video(
+                transcode_job.source_dir,
+                transcode_job.optimized_dir_path,
+                transcode_job.original_dir_path,
+                transcode_job.catalog_folder_id,
+                transcode_task_id,
+                transcode_job.job_id,
+                temp_dir,
+                transcode_job.progress_4_transcode,
+                transcode_job.progress_4_transfer
+            )),
+            is_final_stage=False
+        )
+        if not encoded:
+            self.clear_task_checkpoint(transcode_task_id, temp_dir)
+            return
+        transfer_queue.put((video_transfers[-1], temp_dir))
+
+    def run_video_transfers(self, transcode_job: TranscodeJob, transfer_queue, transfer_errors):
+        while True:
+            queued_transfer = transfer_queue.get()
+            if queued_transfer is None:
                 break
-            self.job_service.set_error(transcode_job_id, JobErrors.NONE)
-            with tempfile.TemporaryDirectory() as temp_dir:
-                retry_task = True # Start as True just to enter the loop, but then we will only set it back to True when we want to retry
-                while retry_task == True:
-                    retry_task = False
-                    try:
-                        self.task_service.set_task_status(transcode_task_id, TaskStatus.INCOMPLETE)
-                        self.task_service.set_task_error_message(transcode_task_id, '')
-
-                        if (media_type == MediaType.VIDEO):
-                            self.transcode_video(
-                                source_dir,
-                                optimized_dir_path,
-                                original_dir_path,
-                                catalog_folder_id,
-                                transcode_task_id,
-                                transcode_job_id,
-                                temp_dir,
-                                progress_4_transcode,
-                                progress_4_transfer
-                            )
-                        else:
-                            self.transcode_image(optimized_dir_path, original_dir_path, local_dir_path, transcode_task_id, transcode_job_id, temp_dir)
-
-                        self.task_service.set_task_progress(transcode_task_id, 100)
-                        self.task_service.set_task_status(transcode_task_id, TaskStatus.COMPLETED)
-
-                    except FileNotFoundError as e:
-                        # We catch and retry on this error because it might signal that the user lost internet connection or
-                        # VPN access to one of the output folders. We set an error string on the Job-level for communication to the UI
-                        retry_task = True
-                        print_err(str(e))
-                        self.job_service.set_error(transcode_job_id, JobErrors.FILE_NOT_FOUND)
-                        time.sleep(RETRY_DELAY_SEC)
 
-                    except Exception as e:
-                        print_err(str(e))
-                        self.task_service.set_task_progress(transcode_task_id, 0)
-                        self.task_service.set_task_status(transcode_task_id, TaskStatus.ERROR)
-                        self.task_service.set_task_error_message(transcode_task_id, str(e))
-
-                    finally:
-                        # If the Job no longer exists, the user must have deleted it while we were working on this task
-                        # If the task was within a subprocess when this happened, the subprocess should have been terminated
-                        parent_job = self.job_service.get_job(transcode_job_id)
-                        if not parent_job:
-                            print_out(f'parent job {transcode_job_id} was deleted while task {transcode_task_id} was in progress, cleaning up')
-                            self.task_service.force_delete(transcode_task_id)
-                            break_task_loop = True
-                            break
-
-                        # It might feel wrong to run this before breaking/killing the task, but will_complete will be false
-                        will_complete = self.job_service.will_job_complete(transcode_job_id)
-                        if will_complete:
-                            self.report_service.create_final_report(transcode_job_id, media_type, source_dir, original_dir_path, optimized_dir_path)
-                            if report_dir:
-                                self.ingest_service.export_report(transcode_job_id, report_dir)
-
-                        self.job_service.set_job_status(transcode_job_id)
+            video_transfer, temp_dir = queued_transfer
+            transcode_task_id = video_transfer.transcode_task_id
+            try:
+                if transcode_job.job_deleted.is_set():
+                    # The task was waiting on its transfer when the job was deleted
+                    self.task_service.force_delete(transcode_task_id)
+                    continue
+                self.run_task_stage(transcode_job, transcode_task_id, lambda: self.transfer_video(video_transfer))
+            except Exception as e:
+                # Keep draining the queue, otherwise encoders that are waiting to hand off would block forever
+                print_err(f'Error transferring task {transcode_task_id}: {e}')
+                transfer_errors.append(e)
+            finally:
+                self.clear_task_checkpoint(transcode_task_id, temp_dir)
+
+    def run_task_stage(self, transcode_job: TranscodeJob, transcode_task_id, stage, is_final_stage=True):
+        transcode_job_id = transcode_job.job_id
+        stage_succeeded = False
+        retry_task = True # Start as True just to enter the loop, but then we will only set it back to True when we want to retry
+        while retry_task == True:
+            retry_task = False
+            try:
+                self.task_service.set_task_status(transcode_task_id, TaskStatus.INCOMPLETE)
+                self.task_service.set_task_error_message(transcode_task_id, '')
+
+                stage()
+                self.clear_file_not_found(transcode_job_id, transcode_task_id)
+
+                if is_final_stage:
+                    self.task_service.set_task_progress(transcode_task_id, 100)
+                    self.task_service.set_task_status(transcode_task_id, TaskStatus.COMPLETED)
+                stage_succeeded = True
+
+            except FileNotFoundError as e:
+                # We catch and retry on this error because it might signal that the user lost internet connection or
+                # VPN access to one of the output folders. We set an error string on the Job-level for communication to the UI
+                retry_task = True
+                print_err(str(e))
+                self.set_file_not_found(transcode_job_id, transcode_task_id)
+                time.sleep(RETRY_DELAY_SEC)
+
+            except Exception as e:
+                print_err(str(e))
+                # This task is done retrying, so its FILE_NOT_FOUND no longer holds
+                self.clear_file_not_found(transcode_job_id, transcode_task_id)
+                self.task_service.set_task_progress(transcode_task_id, 0)
+                self.task_service.set_task_status(transcode_task_id, TaskStatus.ERROR)
+                self.task_service.set_task_error_message(transcode_task_id, str(e))
+
+            finally:
+                # If the Job no longer exists, the user must have deleted it while we were working on this task
+                # If the task was within a subprocess when this happened, the subprocess should have been terminated
+                parent_job = self.job_service.get_job(transcode_job_id)
+                if not parent_job:
+                    print_out(f'parent job {transcode_job_id} was deleted while task {transcode_task_id} was in progress, cleaning up')
+                    self.task_service.force_delete(transcode_task_id)
+                    with self.file_not_found_lock:
+                        self.file_not_found_task_ids.pop(transcode_job_id, None)
+                    transcode_job.job_deleted.set()
+                    return False
+
+                self.update_job_completion(transcode_job)
+
+        return stage_succeeded
+
+    def set_file_not_found(self, transcode_job_id, transcode_task_id):
+        with self.file_not_found_lock:
+            self.file_not_found_task_ids.setdefault(transcode_job_id, set()).add(transcode_task_id)
+            self.job_service.set_error(transcode_job_id, JobErrors.FILE_NOT_FOUND)
+
+    def clear_file_not_found(self, transcode_job_id, transcode_task_id):
+        # Only the task that raised the error can take it back, and only the last one to do so clears it
+        with self.file_not_found_lock:
+            waiting_task_ids = self.file_not_found_task_ids.get(transcode_job_id)
+            if not waiting_task_ids or transcode_task_id not in waiting_task_ids:
+                return
+            waiting_task_ids.discard(transcode_task_id)
+            if not waiting_task_ids:
+                del self.file_not_found_task_ids[transcode_job_id]
+                self.job_service.set_error(transcode_job_id, JobErrors.NONE)
+
+    def update_job_completion(self, transcode_job: TranscodeJob):
+        # Tasks finish concurrently, so only one of them at a time may decide whether the job is done,
+        # and only the first one to see the completed job creates the final report
+        with transcode_job.completion_lock:
+            transcode_job_id = transcode_job.job_id
+            # It might feel wrong to run this before breaking/killing the task, but will_complete will be false
+            will_complete = self.job_service.will_job_complete(transcode_job_id)
+            if will_complete and not transcode_job.report_created:
+                self.report_service.create_final_report(
+                    transcode_job_id,
+                    transcode_job.media_type,
+                    transcode_job.source_dir,
+                    transcode_job.original_dir_path,
+                    transcode_job.optimized_dir_path
+                )
+                if transcode_job.report_dir:
+                    self.ingest_service.export_report(transcode_job_id, transcode_job.report_dir)
+                transcode_job.report_created = True
+
+            self.job_service.set_job_status(transcode_job_id)
 
     def transcode_video(self, source_dir, optimized_dir_path, original_dir_path, catalog_folder_id, transcode_task_id, transcode_job_id, temp_dir, progress_4_transcode, progress_4_transfer):
+        video_transfer = self.encode_video(
+            source_dir,
+            optimized_dir_path,
+            original_dir_path,
+            catalog_folder_id,
+            transcode_task_id,
+            transcode_job_id,
+            temp_dir,
+            progress_4_transcode,
+            progress_4_transfer
+        )
+        self.transfer_video(video_transfer)
+
+    def encode_video(self, *args) -> VideoTransfer:
+        with self.counting_video_encode():
+            return self.encode_video_renditions(*args)
+
+    @contextlib.contextmanager
+    def counting_video_encode(self):
+        with self.active_video_encodes_lock:
+            TranscodeService.active_video_encodes += 1
+        try:
+            yield
+        finally:
+            with self.active_video_encodes_lock:
+                TranscodeService.active_video_encodes -= 1
+
+    def encode_video_renditions(self, source_dir, optimized_dir_path, original_dir_path, catalog_folder_id, transcode_task_id, transcode_job_id, temp_dir, progress_4_transcode, progress_4_transfer) -> VideoTransfer:
         transcode_settings = self.task_service.get_transcode_settings(transcode_task_id)
         self.task_service.set_task_progress(transcode_task_id, 0, TaskProgessMessages.TRANSCODING.value)
 
@@ -408,7 +756,12 @@ class TranscodeService:
         expected_final_dir = os.path.join(optimized_dir_path, *original_subdirs, output_file_name)
         expected_original_dir = os.path.join(original_dir_path, *original_subdirs)
 
-        if os.path.isdir(expected_final_dir):
+        checkpoint = self.task_service.get_task_checkpoint(transcode_task_id)
+        if checkpoint.temp_dir != temp_dir:
+            # A checkpoint can only be resumed from if its temp outputs are still where we left them
+            checkpoint = TaskCheckpoint(temp_dir=temp_dir)
+
+        if os.path.isdir(expected_final_dir) and not checkpoint.dash_moved:
             # if final dir exists we must delete it, in order to perform a move of a whole new folder to that same location
             # this is because the Dash output will be a folder of files, whereas the original file is a single file
             shutil.rmtree(expected_final_dir, ignore_errors=True)
@@ -428,127 +781,382 @@ class TranscodeService:
         temp_mpd_file = os.path.join(temp_dash_container, output_file_name_mpd)
         os.makedirs(temp_dash_container, exist_ok=True)
 
-        # Transcode the video into multiple intermediates
+        # Transcode the video into multiple intermediates, skipping the renditions that a previous attempt finished
         num_frames = transcode_settings.num_frames
         keyframe_rate = output_framerate * 2
-        progress_bounds = TranscodeService.calculate_progress_bounds(progress_ratios)
-        for index, output_height in enumerate(heights_to_use):
-            bandwidth = bandwidths_to_use[index]
-            temp_file = temp_files[index]
-            ffmpeg_command = self.generate_transcode_command(
+        already_packaged = checkpoint.dash_moved or (checkpoint.dash_packaged and os.path.isfile(temp_mpd_file))
+
+        video_duration = num_frames / max(output_framerate, 1)
+        can_use_direct_dash = (
+            self.DIRECT_DASH_OUTPUT
+            and not checkpoint.rendition_files
+            and video_duration < self.CHUNKED_ENCODE_MIN_DURATION_SEC
+        )
+        dash_packager = self.DASH_PACKAGER_FFMPEG if can_use_direct_dash else self.DASH_PACKAGER_MP4BOX
+
+        # The same source bytes transcoded with the same ladder settings always give the same DASH output,
+        # so a re-queued video can reuse what an earlier job already produced
+        cache_key = self.make_video_cache_key(original_file, heights_to_use, bandwidths_to_use, output_framerate, dash_packager)
+        if not already_packaged and cache_key:
+            cached_dash_container = self.transcode_cache.get(cache_key)
+            if cached_dash_container:
+                print_out(f'Reusing cached DASH output for {original_file}')
+                shutil.rmtree(temp_dash_container, ignore_errors=True)
+                if self.restore_cached_dash_container(cached_dash_container, temp_dash_container, output_file_name_mpd):
+                    checkpoint.dash_packaged = True
+                    checkpoint.temp_dash_container = temp_dash_container
+                    self.task_service.set_task_checkpoint(transcode_task_id, checkpoint)
+                    already_packaged = True
+                else:
+                    os.makedirs(temp_dash_container, exist_ok=True)
+
+        if can_use_direct_dash and not already_packaged:
+            shutil.rmtree(temp_dash_container, ignore_errors=True)
+            os.makedirs(temp_dash_container, exist_ok=True)
+            ffmpeg_command = self.generate_direct_dash_command(
                 original_file,
                 keyframe_rate,
                 output_framerate,
-                output_height,
-                bandwidth,
-                temp_file,
+                heights_to_use,
+                bandwidths_to_use,
+                temp_mpd_file,
+                output_file_name_mpd,
             )
-
-            progress_bounds_for_sub_task = progress_bounds[index]
             line_handler = self.create_ffmpeg_line_handler(
                 transcode_task_id,
                 num_frames,
-                progress_bounds_for_sub_task,
+                (0, 100),
+                progress_4_transcode / 100,
+            )
+            try:
+                TranscodeService.run_command_with_terminator(ffmpeg_command, line_handler)
+                already_packaged = True
+            except subprocess.CalledProcessError as e:
+                if not self.job_service.get_job(transcode_job_id):
+                    # The process was killed because the job went away, there is nothing to fall back for
+                    raise e
+                print_err(f'Direct DASH output failed for {original_file}, falling back to MP4Box: {e}')
+                cache_key = self.make_video_cache_key(
+                    original_file, heights_to_use, bandwidths_to_use, output_framerate, self.DASH_PACKAGER_MP4BOX
+                )
+                shutil.rmtree(temp_dash_container, ignore_errors=True)
+                os.makedirs(temp_dash_container, exist_ok=True)
+            if already_packaged:
+                checkpoint.dash_packaged = True
+                checkpoint.temp_dash_container = temp_dash_container
+                self.task_service.set_task_checkpoint(transcode_task_id, checkpoint)
+                if cache_key:
+                    self.transcode_cache.put(cache_key, temp_dash_container)
+
+        pending_indexes = [
+            index for index, height in enumerate(heights_to_use)
+            if not checkpoint.is_rendition_done(height)
+        ]
+        if already_packaged:
+            pending_indexes = []
+        if pending_indexes:
+            checkpoint.dash_packaged = False
+        if pending_indexes and video_duration >= self.CHUNKED_ENCODE_MIN_DURATION_SEC:
+            # Long videos are cut into GOP-aligned chunks that encode concurrently, then get stitched back together
+            self.encode_ladder_in_chunks(
+                transcode_task_id,
+                original_file,
+                keyframe_rate,
+                output_framerate,
+                num_frames,
+                [heights_to_use[index] for index in pending_indexes],
+                [bandwidths_to_use[index] for index in pending_indexes],
+                [temp_files[index] for index in pending_indexes],
+                checkpoint,
+                progress_4_transcode,
+            )
+            for index in pending_indexes:
+                checkpoint.rendition_files[str(heights_to_use[index])] = temp_files[index]
+            self.task_service.set_task_checkpoint(transcode_task_id, checkpoint)
+        elif pending_indexes and self.SINGLE_DECODE_LADDER:
+            # Decode the source once and fan it out to every rendition within one ffmpeg process
+            ffmpeg_command = self.generate_ladder_transcode_command(
+                original_file,
+                keyframe_rate,
+                output_framerate,
+                [heights_to_use[index] for index in pending_indexes],
+                [bandwidths_to_use[index] for index in pending_indexes],
+                [temp_files[index] for index in pending_indexes],
+            )
+            line_handler = self.create_ffmpeg_line_handler(
+                transcode_task_id,
+                num_frames,
+                (0, 100),
                 progress_4_transcode / 100,
             )
             TranscodeService.run_command_with_terminator(ffmpeg_command, line_handler)
+            for index in pending_indexes:
+                checkpoint.rendition_files[str(heights_to_use[index])] = temp_files[index]
+            self.task_service.set_task_checkpoint(transcode_task_id, checkpoint)
+        elif pending_indexes:
+            progress_bounds = TranscodeService.calculate_progress_bounds(progress_ratios)
+            for index in pending_indexes:
+                output_height = heights_to_use[index]
+                bandwidth = bandwidths_to_use[index]
+                temp_file = temp_files[index]
+                ffmpeg_command = self.generate_transcode_command(
+                    original_file,
+                    keyframe_rate,
+                    output_framerate,
+                    output_height,
+                    bandwidth,
+                    temp_file,
+                )
+
+                progress_bounds_for_sub_task = progress_bounds[index]
+                line_handler = self.create_ffmpeg_line_handler(
+                    transcode_task_id,
+                    num_frames,
+                    progress_bounds_for_sub_task,
+                    progress_4_transcode / 100,
+                )
+                TranscodeService.run_command_with_terminator(ffmpeg_command, line_handler)
+                checkpoint.rendition_files[str(output_height)] = temp_file
+                self.task_service.set_task_checkpoint(transcode_task_id, checkpoint)
 
         # Combine the intermediates into a single DASH file
-        intermediate_files = [
-            f'{temp_file}#video:id={heights_to_use[index]}'
-            for index, temp_file in enumerate(temp_files)
-        ]
-        mp4box_command = self.generate_dash_command(intermediate_files, temp_mpd_file, output_file_name_mpd)
-        TranscodeService.run_command_with_terminator(mp4box_command)
+        if not already_packaged:
+            # Segments left behind by an interrupted MP4Box run must not end up in the new package
+            shutil.rmtree(temp_dash_container, ignore_errors=True)
+            os.makedirs(temp_dash_container, exist_ok=True)
+            intermediate_files = [
+                f'{temp_file}#video:id={heights_to_use[index]}'
+                for index, temp_file in enumerate(temp_files)
+            ]
+            mp4box_command = self.generate_dash_command(intermediate_files, temp_mpd_file, output_file_name_mpd)
+            TranscodeService.run_command_with_terminator(mp4box_command)
+            checkpoint.dash_packaged = True
+            checkpoint.temp_dash_container = temp_dash_container
+            self.task_service.set_task_checkpoint(transcode_task_id, checkpoint)
+            if cache_key:
+                self.transcode_cache.put(cache_key, temp_dash_container)
+        self.task_service.set_task_progress(transcode_task_id, progress_4_transcode)
+
+        return VideoTransfer(
+            transcode_task_id=transcode_task_id,
+            transcode_job_id=transcode_job_id,
+            original_file=original_file,
+            temp_dash_container=temp_dash_container,
+            output_file_name_mpd=output_file_name_mpd,
+            expected_final_dir=expected_final_dir,
+            expected_original_dir=expected_original_dir,
+            optimized_dir_path=optimized_dir_path,
+            catalog_folder_id=catalog_folder_id,
+            output_framerate=output_framerate,
+            progress_4_transcode=progress_4_transcode,
+            progress_4_transfer=progress_4_transfer,
+        )
+
+    def make_video_cache_key(self, original_file, heights_to_use, bandwidths_to_use, output_framerate, dash_packager):
+        try:
+            source_fingerprint = fingerprint_file(original_file)
+        except OSError as e:
+            # Let the transcode itself surface the problem with the source, the cache is only an optimization
+            print_err(f'Could not fingerprint {original_file}: {e}')
+            return None
+        return self.transcode_cache.make_key(
+            MediaType.VIDEO.value,
+            self.TRANSCODE_CACHE_VERSION,
+            source_fingerprint,
+            heights_to_use,
+            bandwidths_to_use,
+            output_framerate,
+            dash_packager,
+        )
+
+    def restore_cached_dash_container(self, cached_dash_container, temp_dash_container, output_file_name_mpd):
+        if not self.transcode_cache.restore(cached_dash_container, temp_dash_container):
+            return False
+        # The cached manifest is named after whatever the video was called when it was cached
+        for file_name in os.listdir(temp_dash_container):
+            if not file_name.endswith('.mpd') or file_name == output_file_name_mpd:
+                continue
+            cached_mpd_file = os.path.join(temp_dash_container, file_name)
+            with open(cached_mpd_file, 'r', encoding='utf-8') as mpd_handle:
+                mpd_contents = mpd_handle.read()
+            # The manifest may be a hard link into the cache, so write a new file instead of editing this one
+            os.remove(cached_mpd_file)
+            with open(os.path.join(temp_dash_container, output_file_name_mpd), 'w', encoding='utf-8') as mpd_handle:
+                mpd_handle.write(mpd_contents.replace(file_name, output_file_name_mpd))
+        return True
+
+    def get_transcode_cache_size(self):
+        cache_size_gb = self.settings_service.get_setting(SettingsEnum.TRANSCODE_CACHE_SIZE_GB.value)
+        try:
+            cache_size_gb = float(cache_size_gb) if cache_size_gb else self.DEFAULT_TRANSCODE_CACHE_SIZE_GB
+        except ValueError:
+            print_err(f'Ignoring invalid {SettingsEnum.TRANSCODE_CACHE_SIZE_GB.value} setting: {cache_size_gb}')
+            cache_size_gb = self.DEFAULT_TRANSCODE_CACHE_SIZE_GB
+        return int(cache_size_gb * 1024 ** 3)
+
+    def get_transfer_concurrency(self):
+        configured_concurrency = self.settings_service.get_setting(SettingsEnum.TRANSFER_CONCURRENCY.value)
+        if configured_concurrency:
+            try:
+                return max(1, int(configured_concurrency))
+            except ValueError:
+                print_err(f'Ignoring invalid {SettingsEnum.TRANSFER_CONCURRENCY.value} setting: {configured_concurrency}')
+        return self.DEFAULT_TRANSFER_CONCURRENCY
+
+    def get_transcode_cache_stats(self):
+        return self.transcode_cache.get_stats()
+
+    def get_preview_cache(self):
+        # Built on demand since the thumbnail directory can change while the app is running
+        thumbnail_dir = self.settings_service.get_setting(SettingsEnum.THUMBNAIL_DIR_PATH.value)
+        cache_size_mb = self.settings_service.get_setting(SettingsEnum.PREVIEW_CACHE_SIZE_MB.value)
+        try:
+            cache_size_mb = float(cache_size_mb) if cache_size_mb else self.DEFAULT_PREVIEW_CACHE_SIZE_MB
+        except ValueError:
+            print_err(f'Ignoring invalid {SettingsEnum.PREVIEW_CACHE_SIZE_MB.value} setting: {cache_size_mb}')
+            cache_size_mb = self.DEFAULT_PREVIEW_CACHE_SIZE_MB
+        return CacheService(
+            'preview',
+            os.path.join(thumbnail_dir, self.PREVIEW_CACHE_DIRNAME),
+            int(cache_size_mb * 1024 ** 2)
+        )
+
+    def make_preview_cache_key(self, preview_cache, file_path, *settings):
+        try:
+            file_stat = os.stat(file_path)
+        except OSError as e:
+            print_err(f'Could not stat {file_path}: {e}')
+            return None
+        return preview_cache.make_key(os.path.abspath(file_path), file_stat.st_size, file_stat.st_mtime_ns, *settings)
+
+    def get_preview_cache_stats(self):
+        return self.get_preview_cache().get_stats()
+
+    def transfer_video(self, video_transfer: VideoTransfer):
+        transcode_task_id = video_transfer.transcode_task_id
+        transcode_job_id = video_transfer.transcode_job_id
+        original_file = video_transfer.original_file
+        temp_dash_container = video_transfer.temp_dash_container
+        output_file_name_mpd = video_transfer.output_file_name_mpd
+        expected_final_dir = video_transfer.expected_final_dir
+        expected_original_dir = video_transfer.expected_original_dir
+        optimized_dir_path = video_transfer.optimized_dir_path
+        progress_4_transcode = video_transfer.progress_4_transcode
+        progress_4_transfer = video_transfer.progress_4_transfer
+        checkpoint = self.task_service.get_task_checkpoint(transcode_task_id)
         self.task_service.set_task_progress(transcode_task_id, progress_4_transcode, TaskProgessMessages.COPYING.value)
 
-        # Official Output - Copy the whole DASH folder to the optimized directory
-        folder_to_move_into = os.path.dirname(expected_final_dir)
-        print_out(f'Moving {temp_dash_container} into {folder_to_move_into}')
-        t = threading.Thread(
-            target=self.file_size_progress_reporter,
-            args=(
-                transcode_task_id,
-                expected_final_dir,
+        if not checkpoint.dash_moved:
+            # Official Output - Copy the whole DASH folder to the optimized directory
+            folder_to_move_into = os.path.dirname(expected_final_dir)
+            print_out(f'Moving {temp_dash_container} into {folder_to_move_into}')
+            copy_progress = CopyProgress(
                 get_size_of_folder_contents_recursively(temp_dash_container),
                 (progress_4_transcode + 1, progress_4_transcode + (progress_4_transfer * 0.5)),
-                True
+                lambda progress: self.task_service.set_task_progress(transcode_task_id, progress),
             )
-        )
-        t.start()
 
-        copy_success_1 = False
-        while copy_success_1 == False:
-            try:
-                # We do this because shutil.move does not throw this on its own, and also to avoid switching the JobError back to None too early
-                if not os.path.isdir(folder_to_move_into):
-                    raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), folder_to_move_into)
-                self.job_service.set_error(transcode_job_id, JobErrors.NONE)
-                if os.path.isdir(expected_final_dir):
-                    shutil.rmtree(expected_final_dir, ignore_errors=True)
-                shutil.move(temp_dash_container, folder_to_move_into)
-                copy_success_1 = True
-            except FileNotFoundError as e:
-                print_err(str(e))
-                self.job_service.set_error(transcode_job_id, JobErrors.FILE_NOT_FOUND)
-                time.sleep(RETRY_DELAY_SEC)
-            except OSError as e:
-                if '[WinError 53]' in str(e):
+            transfer_concurrency = self.get_transfer_concurrency()
+            transfer_attempt = 0
+            copy_success_1 = False
+            while copy_success_1 == False:
+                try:
+                    # We do this because shutil.move does not throw this on its own
+                    if not os.path.isdir(folder_to_move_into):
+                        raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), folder_to_move_into)
+                    # Segments are uploaded in parallel and the manifest goes last, so the output never looks complete early.
+                    # A retry keeps the segments that already made it across
+                    transfer_attempt += 1
+                    if transfer_attempt == 1 and os.path.isdir(expected_final_dir):
+                        shutil.rmtree(expected_final_dir, ignore_errors=True)
+                    copy_progress.add(-copy_progress.bytes_copied)
+                    copy_folder_chunked(
+                        temp_dash_container,
+                        expected_final_dir,
+                        copy_progress.add,
+                        max_workers=transfer_concurrency,
+                        copy_last_extensions=('.mpd',),
+                        skip_existing=transfer_attempt > 1,
+                    )
+                    copy_success_1 = True
+                    self.clear_file_not_found(transcode_job_id, transcode_task_id)
+                except FileNotFoundError as e:
                     print_err(str(e))
-                    self.job_service.set_error(transcode_job_id, JobErrors.FILE_NOT_FOUND)
+                    self.set_file_not_found(transcode_job_id, transcode_task_id)
                     time.sleep(RETRY_DELAY_SEC)
-                else:
-                    raise e
-            finally:
-                # If the Job no longer exists, the user must have deleted it while we were inside this retry loop
-                parent_job = self.job_service.get_job(transcode_job_id)
-                if not parent_job:
-                    break
+                except OSError as e:
+                    if '[WinError 53]' in str(e):
+                        print_err(str(e))
+                        self.set_file_not_found(transcode_job_id, transcode_task_id)
+                        time.sleep(RETRY_DELAY_SEC)
+                    else:
+                        raise e
+                finally:
+                    # If the Job no longer exists, the user must have deleted it while we were inside this retry loop
+                    parent_job = self.job_service.get_job(transcode_job_id)
+                    if not parent_job:
+                        break
+
+            if copy_success_1:
+                checkpoint.dash_moved = True
+                self.task_service.set_task_checkpoint(transcode_task_id, checkpoint)
 
-        t.join()
         self.task_service.set_task_progress(transcode_task_id, progress_4_transcode + (progress_4_transfer * 0.5))
 
-        # Official Output - Copy original file to original directory
-        # This should happen after the transcode as it is less likely to fail
-        print_out(f'Copying {original_file} to {expected_original_dir}')
-        t = threading.Thread(
-            target=self.file_size_progress_reporter,
-            args=(
-                transcode_task_id,
-                os.path.join(expected_original_dir, os.path.basename(original_file)),
-                get_size_of_folder_contents_recursively(original_file),
+        if not checkpoint.original_copied:
+            # Official Output - Copy original file to original directory
+            # This should happen after the transcode as it is less likely to fail
+            print_out(f'Copying {original_file} to {expected_original_dir}')
+            copy_progress = CopyProgress(
+                os.path.getsize(original_file),
                 (progress_4_transcode + (progress_4_transfer * 0.5) + 1, 99),
-                True
+                lambda progress: self.task_service.set_task_progress(transcode_task_id, progress),
             )
-        )
-        t.start()
 
-        copy_success_2 = False
-        while copy_success_2 == False:
-            try:
-                # We do this to avoid switching the JobError back to None too early
-                if not os.path.isdir(expected_original_dir):
-                    raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), expected_original_dir)
-                self.job_service.set_error(transcode_job_id, JobErrors.NONE)
-                shutil.copy(original_file, expected_original_dir)
-                copy_success_2 = True
-            except FileNotFoundError as e:
-                print_err(str(e))
-                self.job_service.set_error(transcode_job_id, JobErrors.FILE_NOT_FOUND)
-                time.sleep(RETRY_DELAY_SEC)
-            finally:
-                # If the Job no longer exists, the user must have deleted it while we were inside this retry loop
-                parent_job = self.job_service.get_job(transcode_job_id)
-                if not parent_job:
-                    break
-
-        t.join()
+            copy_success_2 = False
+            while copy_success_2 == False:
+                try:
+                    # Fail fast with the same error a copy into a vanished share would give
+                    if not os.path.isdir(expected_original_dir):
+                        raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), expected_original_dir)
+                    copy_progress.add(-copy_progress.bytes_copied)
+                    checksum = ChecksumService.new_hash()
+                    copied_original = copy_file_chunked(
+                        original_file,
+                        expected_original_dir,
+                        copy_progress.add,
+                        preserve_metadata=False,
+                        checksum=checksum,
+                    )
+                    copy_success_2 = True
+                    self.clear_file_not_found(transcode_job_id, transcode_task_id)
+                except FileNotFoundError as e:
+                    print_err(str(e))
+                    self.set_file_not_found(transcode_job_id, transcode_task_id)
+                    time.sleep(RETRY_DELAY_SEC)
+                finally:
+                    # If the Job no longer exists, the user must have deleted it while we were inside this retry loop
+                    parent_job = self.job_service.get_job(transcode_job_id)
+                    if not parent_job:
+                        break
+
+            if copy_success_2:
+                self.record_original_checksum(transcode_job_id, transcode_task_id, copied_original, checksum.hexdigest())
+                checkpoint.original_copied = True
+                self.task_service.set_task_checkpoint(transcode_task_id, checkpoint)
         self.task_service.set_task_progress(transcode_task_id, 99, TaskProgessMessages.DATA_ENTRY.value)
 
         expected_final_full_path = os.path.join(expected_final_dir, output_file_name_mpd)
         dash_file_partial_leaf = expected_final_full_path.replace(f'{optimized_dir_path}{os.path.sep}', '')
 
-        self.video_model.create_video(catalog_folder_id, os.path.basename(original_file), dash_file_partial_leaf, output_framerate)
+        # The catalog tables share one connection and flush to the same excel file, so one writer at a time
+        with self.catalog_lock:
+            self.video_model.create_video(
+                video_transfer.catalog_folder_id,
+                os.path.basename(original_file),
+                dash_file_partial_leaf,
+                video_transfer.output_framerate
+            )
 
     def generate_transcode_command(self, original_file, keyframe_rate, output_framerate, output_height, bandwidth, temp_file):
         return [
@@ -572,10 +1180,154 @@ class TranscodeService:
             temp_file
         ]
 
+    def encode_ladder_in_chunks(self, transcode_task_id, original_file, keyframe_rate, output_framerate, num_frames, output_heights, bandwidths, temp_files, checkpoint, progress_4_transcode):
+        # Every chunk is a whole number of GOPs long. Since keyint/min-keyint/no-scenecut fix the GOP size, each chunk
+        # starts on exactly the keyframe the unchunked encode would have put there, and a stream copy can join them
+        gop_duration = keyframe_rate / output_framerate
+        chunk_duration = self.CHUNK_DURATION_GOPS * gop_duration
+        video_duration = num_frames / output_framerate
+        num_chunks = max(1, math.ceil(video_duration / chunk_duration))
+        temp_dir = os.path.dirname(temp_files[0])
+
+        chunk_files = [
+            [
+                f'{os.path.splitext(temp_file)[0]}_chunk{chunk_index:04d}.mp4'
+                for temp_file in temp_files
+            ]
+            for chunk_index in range(num_chunks)
+        ]
+        chunks_done = set(
+            chunk_index for chunk_index in checkpoint.chunks_done
+            if chunk_index < num_chunks and all(os.path.isfile(chunk_file) for chunk_file in chunk_files[chunk_index])
+        )
+        checkpoint_lock = threading.Lock()
+
+        frames_by_chunk = [0] * num_chunks
+        for chunk_index in chunks_done:
+            frames_by_chunk[chunk_index] = int(chunk_duration * output_framerate)
+
+        def create_chunk_line_handler(chunk_index):
+            def line_callback(line):
+                frames_complete = TranscodeService.parse_ffmpeg_progress(line)
+                if frames_complete:
+                    frames_by_chunk[chunk_index] = frames_complete
+                    percent_complete = min(sum(frames_by_chunk) / num_frames, 1)
+                    self.task_service.set_task_progress(transcode_task_id, int(100 * percent_complete * progress_4_transcode / 100))
+            return line_callback
+
+        def encode_chunk(chunk_index):
+            is_last_chunk = chunk_index == num_chunks - 1
+            ffmpeg_command = self.generate_ladder_transcode_command(
+                original_file,
+                keyframe_rate,
+                output_framerate,
+                output_heights,
+                bandwidths,
+                chunk_files[chunk_index],
+                start_seconds=chunk_index * chunk_duration,
+                # The last chunk runs to the end of the source, in case the frame count was only an estimate
+                duration_seconds=None if is_last_chunk else chunk_duration,
+            )
+            TranscodeService.run_command_with_terminator(ffmpeg_command, create_chunk_line_handler(chunk_index))
+            with checkpoint_lock:
+                checkpoint.chunks_done.append(chunk_index)
+                self.task_service.set_task_checkpoint(transcode_task_id, checkpoint)
+
+        pending_chunks = [chunk_index for chunk_index in range(num_chunks) if chunk_index not in chunks_done]
+        checkpoint.chunks_done = sorted(chunks_done)
+        print_out(f'Encoding {original_file} as {num_chunks} chunks, {len(pending_chunks)} left to encode')
+        with ThreadPoolExecutor(max_workers=self.get_chunk_concurrency()) as executor:
+            futures = [executor.submit(encode_chunk, chunk_index) for chunk_index in pending_chunks]
+            try:
+                for future in as_completed(futures):
+                    future.result()
+            except Exception as e:
+                for future in futures:
+                    future.cancel()
+                raise e
+
+        # Stitch the chunks of every rendition back together
+        for output_index, temp_file in enumerate(temp_files):
+            concat_list_file = os.path.join(temp_dir, f'{os.path.splitext(os.path.basename(temp_file))[0]}_chunks.txt')
+            with open(concat_list_file, 'w', encoding='utf-8') as list_handle:
+                for chunk_index in range(num_chunks):
+                    escaped_chunk_file = chunk_files[chunk_index][output_index].replace("'", "'\\''")
+                    list_handle.write(f"file '{escaped_chunk_file}'\n")
+            TranscodeService.run_command_with_terminator(self.generate_concat_command(concat_list_file, temp_file))
+
+        for chunk_index in range(num_chunks):
+            for chunk_file in chunk_files[chunk_index]:
+                os.remove(chunk_file)
+        checkpoint.chunks_done = []
+
+    def get_chunk_concurrency(self):
+        # Each chunk runs a whole ladder, so it costs as many cores as a video task. Chunks therefore come out of the
+        # same budget as the video tasks, split between the videos encoding right now: a long video only encodes
+        # several chunks at once when the other video slots are idle
+        video_slots = self.get_task_concurrency(MediaType.VIDEO)
+        with self.active_video_encodes_lock:
+            num_encoding = max(1, TranscodeService.active_video_encodes)
+        return max(1, video_slots // num_encoding)
+
+    def generate_concat_command(self, concat_list_file, temp_file):
+        return [
+            self.ffmpeg_path,
+            '-v', 'warning',
+            '-y',
+            '-f', 'concat',
+            '-safe', '0',
+            '-i', concat_list_file,
+            '-c', 'copy',
+            '-movflags', 'faststart',
+            temp_file
+        ]
+
+    def generate_ladder_transcode_command(self, original_file, keyframe_rate, output_framerate, output_heights, bandwidths, temp_files, start_seconds=None, duration_seconds=None):
+        # One decode of the input is split into a scaled branch per rendition. Each branch then gets
+        # the exact same encoder settings that generate_transcode_command would have used on its own
+        num_outputs = len(output_heights)
+        split_labels = ''.join(f'[split{index}]' for index in range(num_outputs))
+        filter_graph = [f'[0:v]split={num_outputs}{split_labels}']
+        for index, output_height in enumerate(output_heights):
+            filter_graph.append(f'[split{index}]scale=-2:{output_height}[out{index}]')
+
+        command = [
+            self.ffmpeg_path,
+            '-v', 'warning',
+            '-stats',
+            '-y',
+        ]
+        if start_seconds is not None:
+            command.extend(['-ss', f'{start_seconds:.3f}'])
+        if duration_seconds is not None:
+            command.extend(['-t', f'{duration_seconds:.3f}'])
+        command.extend([
+            '-i', original_file,
+            '-filter_complex', ';'.join(filter_graph),
+        ])
+        for index, temp_file in enumerate(temp_files):
+            bandwidth = bandwidths[index]
+            command.extend([
+                '-map', f'[out{index}]',
+                '-c:v', 'libx264',
+                '-x264opts', f'keyint={keyframe_rate}:min-keyint={keyframe_rate}:no-scenecut',
+                '-r', str(output_framerate),
+                '-pix_fmt', 'yuv420p',
+                '-b:v', f'{bandwidth}k',
+                '-maxrate', f'{bandwidth}k',
+                '-bufsize', f'{bandwidth * 2}k',
+                '-profile:v', 'main',
+                '-movflags', 'faststart',
+                '-preset', 'fast',
+                '-an',
+                temp_file,
+            ])
+        return command
+
     def generate_dash_command(self, intermediate_files, temp_mpd_file, output_file_name_mpd):
         return [
             self.mp4box_path,
-            '-dash', '4000',
+            '-dash', str(self.DASH_SEGMENT_DURATION_SEC * 1000),
             '-rap',
             '-segment-name', 'segment_$RepresentationID$_',
             *intermediate_files,
@@ -583,6 +1335,52 @@ class TranscodeService:
             '-mpd-title', f'"{output_file_name_mpd}"'
         ]
 
+    def generate_direct_dash_command(self, original_file, keyframe_rate, output_framerate, output_heights, bandwidths, temp_mpd_file, output_file_name_mpd):
+        # Same split/scale graph and encoder settings as the ladder command, but every branch is muxed into
+        # one DASH manifest. ffmpeg numbers the representations by output stream, where MP4Box names them after
+        # their height, so the segment file names differ between the two packagers
+        num_outputs = len(output_heights)
+        split_labels = ''.join(f'[split{index}]' for index in range(num_outputs))
+        filter_graph = [f'[0:v]split={num_outputs}{split_labels}']
+        for index, output_height in enumerate(output_heights):
+            filter_graph.append(f'[split{index}]scale=-2:{output_height}[out{index}]')
+
+        command = [
+            self.ffmpeg_path,
+            '-v', 'warning',
+            '-stats',
+            '-y',
+            '-i', original_file,
+            '-filter_complex', ';'.join(filter_graph),
+        ]
+        for index in range(num_outputs):
+            command.extend(['-map', f'[out{index}]'])
+        for index, bandwidth in enumerate(bandwidths):
+            command.extend([
+                f'-b:v:{index}', f'{bandwidth}k',
+                f'-maxrate:v:{index}', f'{bandwidth}k',
+                f'-bufsize:v:{index}', f'{bandwidth * 2}k',
+            ])
+        command.extend([
+            '-c:v', 'libx264',
+            '-x264opts', f'keyint={keyframe_rate}:min-keyint={keyframe_rate}:no-scenecut',
+            '-r', str(output_framerate),
+            '-pix_fmt', 'yuv420p',
+            '-profile:v', 'main',
+            '-preset', 'fast',
+            '-an',
+            '-metadata', f'title="{output_file_name_mpd}"',
+            '-f', 'dash',
+            '-seg_duration', str(self.DASH_SEGMENT_DURATION_SEC),
+            '-use_template', '1',
+            '-use_timeline', '0',
+            '-adaptation_sets', 'id=0,streams=v',
+            '-init_seg_name', 'segment_$RepresentationID$_init.mp4',
+            '-media_seg_name', 'segment_$RepresentationID$_$Number$.m4s',
+            temp_mpd_file,
+        ])
+        return command
+
     def create_ffmpeg_line_handler(self, transcode_task_id, total_frames, progress_bounds=(0, 100), progress_ratio_within_job=1.0):
         def line_callback(line):
             frames_complete = TranscodeService.parse_ffmpeg_progress(line)
@@ -597,10 +1395,21 @@ class TranscodeService:
         return line_callback
 
 
-    def transcode_image(self, optimized_dir_path, original_dir_path, local_dir_path, transcode_task_id, transcode_job_id, temp_dir):
+    def transcode_image(self, optimized_dir_path, original_dir_path, local_dir_path, transcode_task_id, transcode_job_id, temp_dir, image_batch=None):
         transcode_settings = self.task_service.get_transcode_settings(transcode_task_id)
         job_data = self.job_service.get_job_data(transcode_job_id)
 
+        single_pass_output = None
+        if transcode_settings.needs_metadata and self.SINGLE_PASS_IMAGE_PIPELINE and self.is_converted_in_process(transcode_settings.file_path):
+            try:
+                single_pass_output = self.run_single_pass_image(temp_dir, transcode_settings, job_data["compression_buckets"])
+            except Exception as e:
+                # e.g. an image mode Pillow can't convert, these go the way every other image does
+                print_err(f'Single pass of {transcode_settings.file_path} failed, using exiftool and the image engines: {e}')
+            else:
+                transcode_settings.needs_metadata = False
+                self.task_service.set_task_settings(transcode_task_id, transcode_settings)
+
         if transcode_settings.needs_metadata:
             result = self.image_metadata_service.parse_metadata([transcode_settings.file_path])
             metadata = result[0]
@@ -611,16 +1420,207 @@ class TranscodeService:
             transcode_settings.needs_metadata = False
             self.task_service.set_task_settings(transcode_task_id, transcode_settings)
 
-        file_path, optimized_temp_path = self.run_transcode_commands(temp_dir, transcode_settings)
+        if single_pass_output:
+            file_path, optimized_temp_path = single_pass_output
+        else:
+            file_path, optimized_temp_path = self.run_cached_transcode_commands(temp_dir, transcode_settings, transcode_task_id, image_batch)
         self.task_service.set_task_progress(transcode_task_id, 66)
 
         # Official Outputs
-        copy_file_with_attempts(file_path, original_dir_path)
-        self.task_service.set_task_progress(transcode_task_id, 85)
-        copy_file_with_attempts(optimized_temp_path, optimized_dir_path)
-        self.task_service.set_task_progress(transcode_task_id, 99)
-        copy_file_with_attempts(optimized_temp_path, local_dir_path)
+        report_progress = lambda progress: self.task_service.set_task_progress(transcode_task_id, progress)
+        checksum = copy_file_with_attempts(file_path, original_dir_path, copy_progress=CopyProgress(
+            os.path.getsize(file_path), (66, 85), report_progress
+        ))
+        self.record_original_checksum(
+            transcode_job_id,
+            transcode_task_id,
+            os.path.join(original_dir_path, os.path.basename(file_path)),
+            checksum,
+        )
+        # The optimized image is read from the temp disk once for both of its destinations
+        copy_file_fanout(optimized_temp_path, [optimized_dir_path, local_dir_path], copy_progress=CopyProgress(
+            os.path.getsize(optimized_temp_path), (85, 99), report_progress
+        ))
+
+
+    def run_single_pass_image(self, temp_dir, transcode_settings, compression_buckets):
+        # Fills in the metadata of transcode_settings and returns the same paths run_cached_transcode_commands does
+        pillow_image_engine = self.image_engines[0]
+        file_path = transcode_settings.file_path
+        output_name = transcode_settings.new_name or os.path.splitext(os.path.basename(file_path))[0]
+        optimized_temp_path = os.path.join(temp_dir, f'{output_name}.jpg')
+
+        with pillow_image_engine.open(file_path) as image:
+            transcode_settings.input_width, transcode_settings.input_height = image.size
+            transcode_settings.original_date = pillow_image_engine.read_original_date(image)
+            if transcode_settings.original_date is None:
+                # Usually answered by the metadata cache that parse_media filled, exiftool only runs on a miss
+                metadata = self.image_metadata_service.parse_metadata([file_path])
+                transcode_settings.original_date = metadata[0].original_date if metadata else None
+            image_mp = transcode_settings.input_width * transcode_settings.input_height
+            bucket_key = determine_bucket_for_resolution(compression_buckets, image_mp)
+            transcode_settings.jpeg_quality = compression_buckets[bucket_key]['selection']
+
+            # The header alone is enough to find a cached output, which then saves decoding the pixels at all
+            cache_key = self.make_image_cache_key(transcode_settings)
+            cached_image = self.transcode_cache.get(cache_key) if cache_key else None
+            if cached_image and self.transcode_cache.restore(cached_image, optimized_temp_path):
+                return file_path, optimized_temp_path
 
+            pillow_image_engine.save_variants(
+                image,
+                [(optimized_temp_path, transcode_settings.jpeg_quality)],
+                transcode_settings.is_dark
+            )
+
+        if cache_key:
+            self.transcode_cache.put(cache_key, optimized_temp_path)
+        return file_path, optimized_temp_path
+
+    def record_original_checksum(self, transcode_job_id, transcode_task_id, copied_original, checksum):
+        transcode_settings = self.task_service.get_transcode_settings(transcode_task_id)
+        transcode_settings.original_checksum = checksum
+        transcode_settings.original_copy_path = copied_original
+        self.task_service.set_task_settings(transcode_task_id, transcode_settings)
+        # Only kept in memory here, transcode_media writes the manifests once the job is done
+        self.checksum_service.record_checksum(transcode_job_id, copied_original, checksum)
+
+    def write_job_manifests(self, transcode_job_id):
+        # Tasks that completed before a crash are skipped when the job resumes, so the checksums they recorded
+        # in memory are gone. Their task settings still hold them, and are passed along to fill those gaps
+        try:
+            persisted_checksums = [
+                (task.transcode_settings.get('original_copy_path'), task.transcode_settings.get('original_checksum'))
+                for task in self.task_service.get_tasks_by_job_id(transcode_job_id)
+                if task.transcode_settings.get('original_copy_path') and task.transcode_settings.get('original_checksum')
+            ]
+        except Exception as e:
+            print_err(f'Failed to read the persisted checksums of job {transcode_job_id}: {e}')
+            persisted_checksums = []
+        self.checksum_service.write_job_manifests(transcode_job_id, persisted_checksums)
+
+    def make_image_cache_key(self, transcode_settings):
+        try:
+            return self.transcode_cache.make_key(
+                MediaType.IMAGE.value,
+                self.TRANSCODE_CACHE_VERSION,
+                fingerprint_file(transcode_settings.file_path),
+                transcode_settings.jpeg_quality,
+                transcode_settings.is_dark,
+            )
+        except OSError as e:
+            print_err(f'Could not fingerprint {transcode_settings.file_path}: {e}')
+            return None
+
+    def run_cached_transcode_commands(self, temp_dir, transcode_settings, transcode_task_id=None, image_batch=None):
+        output_name = transcode_settings.new_name or os.path.splitext(os.path.basename(transcode_settings.file_path))[0]
+        optimized_temp_path = os.path.join(temp_dir, f'{output_name}.jpg')
+        cache_key = self.make_image_cache_key(transcode_settings)
+
+        if cache_key:
+            cached_image = self.transcode_cache.get(cache_key)
+            if cached_image and self.transcode_cache.restore(cached_image, optimized_temp_path):
+                return transcode_settings.file_path, optimized_temp_path
+
+        batched_image = self.take_batched_image(image_batch, transcode_task_id)
+        if batched_image:
+            shutil.move(batched_image, optimized_temp_path)
+            file_path = transcode_settings.file_path
+        else:
+            # Images that were not batched, or that their batch could not convert, get their own process.
+            # This way any error is raised by, and attributed to, the image that caused it
+            file_path, optimized_temp_path = self.run_transcode_commands(temp_dir, transcode_settings)
+        if cache_key:
+            self.transcode_cache.put(cache_key, optimized_temp_path)
+        return file_path, optimized_temp_path
+
+    def plan_image_batches(self, transcode_job: TranscodeJob, transcode_task_ids, max_workers):
+        # Groups the tasks by their output settings and splits each group into batches. Returns the task ids
+        # reordered so that the first tasks picked up by the pool each belong to a different batch
+        groups = {}
+        unbatched_task_ids = []
+        for transcode_task_id in transcode_task_ids:
+            transcode_settings = self.task_service.get_transcode_settings(transcode_task_id)
+            file_extension = os.path.splitext(transcode_settings.file_path)[1].lower()
+            if transcode_settings.needs_metadata or not transcode_settings.jpeg_quality or file_extension not in image_extensions:
+                # The quality of these is only known once their task has read their metadata
+                unbatched_task_ids.append(transcode_task_id)
+                continue
+            if self.is_converted_in_process(transcode_settings.file_path):
+                # These never start a magick process in the first place
+                unbatched_task_ids.append(transcode_task_id)
+                continue
+            group_key = (str(transcode_settings.jpeg_quality), bool(transcode_settings.is_dark))
+            groups.setdefault(group_key, []).append(transcode_task_id)
+
+        batches = []
+        for (jpeg_quality, is_dark), group_task_ids in groups.items():
+            batch_size = min(self.IMAGE_BATCH_SIZE, max(1, math.ceil(len(group_task_ids) / max_workers)))
+            for start in range(0, len(group_task_ids), batch_size):
+                image_batch = ImageBatch(jpeg_quality, is_dark, group_task_ids[start:start + batch_size])
+                batches.append(image_batch)
+                for transcode_task_id in image_batch.task_ids:
+                    transcode_job.image_batches[transcode_task_id] = image_batch
+
+        ordered_task_ids = []
+        for index in range(max((len(image_batch.task_ids) for image_batch in batches), default=0)):
+            for image_batch in batches:
+                if index < len(image_batch.task_ids):
+                    ordered_task_ids.append(image_batch.task_ids[index])
+        return ordered_task_ids + unbatched_task_ids
+
+    def take_batched_image(self, image_batch: ImageBatch, transcode_task_id):
+        if not image_batch:
+            return None
+        with image_batch.lock:
+            if not image_batch.converted:
+                self.run_image_batch(image_batch)
+                image_batch.converted = True
+            return image_batch.outputs.pop(transcode_task_id, None)
+
+    def run_image_batch(self, image_batch: ImageBatch):
+        # mogrify writes every output under the input's own name, so inputs that share a name, and inputs
+        # whose output is already cached, are left for their tasks to convert by themselves
+        input_paths = {}
+        output_names = set()
+        for transcode_task_id in image_batch.task_ids:
+            transcode_settings = self.task_service.get_transcode_settings(transcode_task_id)
+            output_name = os.path.splitext(os.path.basename(transcode_settings.file_path))[0].lower()
+            if output_name in output_names:
+                continue
+            cache_key = self.make_image_cache_key(transcode_settings)
+            if cache_key and self.transcode_cache.contains(cache_key):
+                continue
+            output_names.add(output_name)
+            input_paths[transcode_task_id] = transcode_settings.file_path
+        if len(input_paths) < 2:
+            return
+
+        image_batch.output_dir = tempfile.mkdtemp(prefix='vital-batch-')
+        command = self.generate_batch_convert_command(
+            list(input_paths.values()),
+            image_batch.output_dir,
+            image_batch.jpeg_quality,
+            image_batch.is_dark,
+        )
+        try:
+            TranscodeService.run_command_with_terminator(command)
+        except Exception as e:
+            # Nothing from a failed batch is trusted, every image of it gets converted again by its own task
+            print_err(f'Batch conversion of {len(input_paths)} images failed, converting them one by one: {e}')
+            return
+
+        for transcode_task_id, input_path in input_paths.items():
+            output_name = os.path.splitext(os.path.basename(input_path))[0]
+            output_path = os.path.join(image_batch.output_dir, f'{output_name}.jpg')
+            if os.path.isfile(output_path):
+                image_batch.outputs[transcode_task_id] = output_path
+
+    def clear_image_batches(self, transcode_job: TranscodeJob):
+        for image_batch in transcode_job.image_batches.values():
+            if image_batch.output_dir:
+                shutil.rmtree(image_batch.output_dir, ignore_errors=True)
+        transcode_job.image_batches.clear()
 
     def run_transcode_commands(self, temp_dir, transcode_settings):
         file_path = transcode_settings.file_path
@@ -636,44 +1636,41 @@ class TranscodeService:
         if file_extension.lower() not in image_extensions:
             raise ValueError(f'Unsupported image file type: {file_extension}')
 
-        command = self.generate_convert_command(file_path, optimized_temp_path, jpeg_quality, is_dark)
-        TranscodeService.run_command_with_terminator(command)
+        self.convert_image(file_path, optimized_temp_path, jpeg_quality, is_dark)
 
         return file_path, optimized_temp_path
 
-    def generate_convert_command(self, input_path, output_path, jpeg_quality, is_dark):
+    def generate_batch_convert_command(self, input_paths, output_dir, jpeg_quality, is_dark):
         command = [
             self.magick_path,
-            input_path,
+            'mogrify',
+            '-path', output_dir,
+            '-format', 'jpg',
         ]
         if is_dark:
             command.extend(auto_exposure_correct)
         command.extend([
             '-quality', f'{jpeg_quality}',
-            output_path,
+            *input_paths,
         ])
         return command
 
-    def file_size_progress_reporter(self, transcode_task_id, file_path, expected_size, progress_bounds=(0, 100), is_folder=False):
-        current_size = 0
-        if expected_size == 1:
-            # this function is useless if the expected_size failed (which is a 1), so its better to not report progress
-            return
-        while current_size < expected_size - 1024:
+    def convert_image(self, input_path, output_path, jpeg_quality, is_dark):
+        self.convert_image_variants(input_path, [(output_path, jpeg_quality)], is_dark)
+
+    def convert_image_variants(self, input_path, variants, is_dark):
+        image_engines = [image_engine for image_engine in self.image_engines if image_engine.supports(input_path)]
+        for image_engine in image_engines:
             try:
-                if is_folder:
-                    current_size = get_size_of_folder_contents_recursively(file_path)
-                else:
-                    current_size = os.path.getsize(file_path)
-            except Exception:
-                pass
-            progress = int(
-                (current_size / expected_size)
-                * (progress_bounds[1] - progress_bounds[0])
-                + progress_bounds[0]
-            )
-            self.task_service.set_task_progress(transcode_task_id, progress)
-            time.sleep(1)
+                image_engine.convert_variants(input_path, variants, is_dark)
+                return
+            except Exception as e:
+                if image_engine is image_engines[-1]:
+                    raise e
+                print_err(f'{image_engine.name} could not convert {input_path}, trying the next engine: {e}')
+
+    def is_converted_in_process(self, input_path):
+        return self.image_engines[0].supports(input_path) and not isinstance(self.image_engines[0], MagickImageEngine)
 
     @staticmethod
     def run_command_with_terminator(command, line_callback = print_out):
@@ -685,7 +1682,7 @@ class TranscodeService:
                 line_callback(line)
             for line in io.TextIOWrapper(proc.stdout, encoding="utf-8"):
                 all_stdout.append(line)
-        remove_last_terminator()
+        remove_terminator(proc.terminate)
         if (proc.returncode != 0):
             raise subprocess.CalledProcessError(proc.returncode, command, proc.stdout, proc.stderr)
         return '\n'.join(all_stdout)
@@ -7,20 +7,41 @@ from datetime import datetime
 from data.media_medatadata import MediaMetadata
 
 from services.metadata_service import MetadataService
+from services.metadata_cache_service import MetadataCacheService
 
 from utils.prints import print_err, print_out
+from utils.mp4_header import read_mp4_video_stream, mp4_extensions
 
 class VideoMetadataService(MetadataService):
 
+    # When True, MP4 and MOV headers are read in-process, and ffprobe only runs for anything that reader can't handle
+    NATIVE_MP4_HEADER_READER = True
+
     def __init__(self):
         base_dir = os.path.dirname(os.path.abspath(sys.argv[0]))
         self.ffprobe_path = os.path.join(base_dir, 'resources', 'ffprobe.exe')
         if not os.path.isfile(self.ffprobe_path):
             print_err(f"ffprobe_path.exe does not exist at {self.ffprobe_path}")
             raise FileNotFoundError(f"ffprobe_path.exe does not exist at {self.ffprobe_path}")
+        self.metadata_cache_service = MetadataCacheService()
 
     def parse_metadata(self, file_path):
-        return self.ffprobe_metadata(file_path, None)
+        cached_metadata = self.metadata_cache_service.lookup([file_path]).get(file_path)
+        if cached_metadata:
+            return cached_metadata
+        metadata = self.read_native_metadata(file_path) or self.ffprobe_metadata(file_path, None)
+        if metadata:
+            self.metadata_cache_service.store([metadata])
+        return metadata
+
+    def read_native_metadata(self, video_path):
+        if not self.NATIVE_MP4_HEADER_READER or os.path.splitext(video_path)[1].lower() not in mp4_extensions:
+            return None
+        try:
+            return self.metadata_from_stream(video_path, read_mp4_video_stream(video_path))
+        except Exception as e:
+            print_out(f'Reading the header of {video_path} with ffprobe instead: {e}')
+            return None
 
     def ffprobe_metadata(self, video_path, start_number=None):
         command = [
@@ -49,7 +70,9 @@ class VideoMetadataService(MetadataService):
         except KeyError:
             print_err(f"No FFprobe metadata was found at path {video_path}")
             return None
+        return self.metadata_from_stream(video_path, metadata)
 
+    def metadata_from_stream(self, video_path, metadata):
         frame_rate = self.parse_frame_rate_str(metadata.get("r_frame_rate"))
         num_frames = self.calculate_num_frames(metadata, frame_rate)
         internal_date = metadata.get('tags', {}).get('creation_time')
@@ -17,6 +17,11 @@ class SettingsEnum(Enum):
     BASE_FOLDER_OF_OPTIMIZED_IMAGES = 'base_folder_of_optimized_images'
     BASE_FOLDER_OF_ORIGINAL_IMAGES = 'base_folder_of_original_images'
 
+    TRANSCODE_CONCURRENCY = 'transcode_concurrency'
+    TRANSCODE_CACHE_SIZE_GB = 'transcode_cache_size_gb'
+    TRANSFER_CONCURRENCY = 'transfer_concurrency'
+    PREVIEW_CACHE_SIZE_MB = 'preview_cache_size_mb'
+
     @classmethod
     def has_value(cls, value):
         return value in cls._value2member_map_
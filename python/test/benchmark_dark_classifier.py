@@ -0,0 +1,79 @@
+"""Compares the batch dark classifier against the exact median it stands in for.
+
+The reference is the per-image magick median. With --exact it is instead the median of the full resolution
+gray values computed in floating point with NumPy, which is what magick's floating point build measures.
+Use that on machines without magick.exe.
+
+ColorCorrectService.DARK_IDENTIFY_RECHECK_MARGIN has to stay above the largest median difference this reports,
+since images within the margin of the threshold are the only ones the batch path measures again with magick.
+
+Run from the python folder, next to a resources folder with magick.exe and exiftool.exe:
+    python -m test.benchmark_dark_classifier <folder of images> [--exact]
+"""
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from services.color_correct_service import ColorCorrectService
+from services.image_engine import PillowImageEngine
+from services.ingest_service import IngestService
+from utils.constants import image_extensions
+
+
+def exact_median(file_path):
+    pillow_image_engine = PillowImageEngine()
+    with pillow_image_engine.open(file_path) as image:
+        pixels = np.asarray(image.convert('RGB'), dtype=np.float64) / 255
+    return float(np.median(pixels @ np.array(PillowImageEngine.GRAY_WEIGHTS)))
+
+
+def main(source_dir, exact=False):
+    color_correct_service = ColorCorrectService()
+    file_paths = IngestService().get_files(source_dir, image_extensions)
+    threshold = ColorCorrectService.DARK_IMAGE_THRESHOLD
+    margin = ColorCorrectService.DARK_IDENTIFY_RECHECK_MARGIN
+    print(f'{len(file_paths)} images in {source_dir}')
+
+    reference_name = 'exact' if exact else 'magick'
+    start = time.perf_counter()
+    if exact:
+        reference_medians = [exact_median(file_path) for file_path in file_paths]
+    else:
+        reference_medians = [color_correct_service.identify_median_with_magick(file_path) for file_path in file_paths]
+    reference_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as executor:
+        results = list(executor.map(color_correct_service.analyze_darkness, file_paths))
+    histogram_indexes = [index for index, result in enumerate(results) if not isinstance(result, float)]
+    batch_medians = list(results)
+    if histogram_indexes:
+        medians = ColorCorrectService.medians_from_histograms([results[index] for index in histogram_indexes])
+        for index, median in zip(histogram_indexes, medians):
+            batch_medians[index] = median
+    batch_seconds = time.perf_counter() - start
+
+    disagreements = []
+    largest_difference = 0
+    num_rechecked = 0
+    for file_path, reference_median, batch_median in zip(file_paths, reference_medians, batch_medians):
+        largest_difference = max(largest_difference, abs(reference_median - batch_median))
+        if abs(batch_median - threshold) < margin:
+            # The batch path takes the magick median for these, so they can't disagree
+            num_rechecked += 1
+        elif (reference_median <= threshold) != (batch_median <= threshold):
+            disagreements.append((file_path, reference_median, batch_median))
+
+    print(f'{reference_name}: {reference_seconds:.2f}s, batch: {batch_seconds:.2f}s ({reference_seconds / max(batch_seconds, 1e-9):.1f}x)')
+    print(f'Largest median difference: {largest_difference:.4f} (recheck margin {margin})')
+    print(f'Measured again by magick: {num_rechecked}')
+    print(f'is_dark agreement: {len(file_paths) - len(disagreements)}/{len(file_paths)}')
+    for file_path, reference_median, batch_median in disagreements:
+        print(f'  {file_path}: {reference_name} {reference_median:.4f}, batch {batch_median:.4f}')
+
+
+if __name__ == '__main__':
+    main(sys.argv[1], '--exact' in sys.argv[2:])
@@ -0,0 +1,62 @@
+import json
+import os
+import tempfile
+import unittest
+
+from services.checksum_service import ChecksumService
+
+
+class TestChecksumService(unittest.TestCase):
+
+    JOB_ID = -1
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.checksum_service = ChecksumService()
+
+    def tearDown(self):
+        ChecksumService._pending_entries.pop(self.JOB_ID, None)
+        self.temp_dir.cleanup()
+
+    def write_original(self, file_name, contents):
+        file_path = os.path.join(self.temp_dir.name, file_name)
+        with open(file_path, 'wb') as file_handle:
+            file_handle.write(contents)
+        return file_path, self.checksum_service.hash_file(file_path)
+
+    def read_manifest_files(self):
+        with open(self.checksum_service.get_manifest_path(self.temp_dir.name), 'r', encoding='utf-8') as manifest_file:
+            return json.load(manifest_file)['files']
+
+    def test_recorded_checksums_are_written_once_the_job_is_done(self):
+        file_path, checksum = self.write_original('a.jpg', b'a')
+        self.checksum_service.record_checksum(self.JOB_ID, file_path, checksum)
+        self.assertFalse(os.path.exists(self.checksum_service.get_manifest_path(self.temp_dir.name)))
+        self.checksum_service.write_job_manifests(self.JOB_ID)
+        self.assertEqual(self.read_manifest_files()['a.jpg']['checksum'], checksum)
+
+    def test_persisted_checksums_fill_in_what_a_crash_lost(self):
+        # a.jpg was copied before the crash, so only its persisted checksum is left. b.jpg was copied after resuming
+        lost_path, lost_checksum = self.write_original('a.jpg', b'a')
+        file_path, checksum = self.write_original('b.jpg', b'b')
+        self.checksum_service.record_checksum(self.JOB_ID, file_path, checksum)
+        self.checksum_service.write_job_manifests(self.JOB_ID, [(lost_path, lost_checksum), (file_path, checksum)])
+
+        manifest_files = self.read_manifest_files()
+        self.assertEqual(manifest_files['a.jpg']['checksum'], lost_checksum)
+        self.assertEqual(manifest_files['b.jpg']['checksum'], checksum)
+        result = self.checksum_service.verify_folder(self.temp_dir.name)
+        self.assertEqual(sorted(result['verified']), ['a.jpg', 'b.jpg'])
+        self.assertEqual(result['missing'], [])
+
+    def test_persisted_checksums_keep_existing_verification(self):
+        file_path, checksum = self.write_original('a.jpg', b'a')
+        self.checksum_service.record_checksum(self.JOB_ID, file_path, checksum)
+        self.checksum_service.write_job_manifests(self.JOB_ID)
+        self.checksum_service.verify_folder(self.temp_dir.name)
+        verified = self.read_manifest_files()['a.jpg']['verified']
+        self.assertIsNotNone(verified)
+
+        # A later resume of the same job passes the same persisted checksum again
+        self.checksum_service.write_job_manifests(self.JOB_ID, [(file_path, checksum)])
+        self.assertEqual(self.read_manifest_files()['a.jpg']['verified'], verified)
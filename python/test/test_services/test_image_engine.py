@@ -0,0 +1,69 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime
+
+import numpy as np
+from PIL import Image
+
+from services.image_engine import PillowImageEngine
+
+ORIGINAL_DATE = '2024:05:06 07:08:09'
+# IFD0 of a RAW describes its thumbnail, whose DateTime is not when the photo was taken
+THUMBNAIL_DATE = '2001:01:01 00:00:00'
+DATE_TIME = 0x0132
+
+
+class TestPillowImageEngine(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.pillow_image_engine = PillowImageEngine()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write_image(self, file_name, image_format, original_date=None):
+        image = Image.new('RGB', (16, 16))
+        exif = image.getexif()
+        exif[DATE_TIME] = THUMBNAIL_DATE
+        if original_date:
+            exif.get_ifd(PillowImageEngine.EXIF_IFD_POINTER)[PillowImageEngine.EXIF_DATE_TIME_ORIGINAL] = original_date
+        image_path = os.path.join(self.temp_dir.name, file_name)
+        image.save(image_path, image_format, exif=exif)
+        return image_path
+
+    def read_original_date(self, image_path):
+        with self.pillow_image_engine.open(image_path) as image:
+            return self.pillow_image_engine.read_original_date(image)
+
+    def test_reads_date_time_original_from_exif_sub_ifd(self):
+        image_path = self.write_image('photo.jpg', 'JPEG', ORIGINAL_DATE)
+        expected = datetime.strptime(ORIGINAL_DATE, '%Y:%m:%d %H:%M:%S').timestamp()
+        self.assertEqual(self.read_original_date(image_path), expected)
+
+    def test_missing_date_time_original_is_left_to_exiftool(self):
+        image_path = self.write_image('photo.jpg', 'JPEG')
+        self.assertIsNone(self.read_original_date(image_path))
+
+    def test_tiff_based_raw_is_left_to_exiftool(self):
+        image_path = self.write_image('photo.nef', 'TIFF', ORIGINAL_DATE)
+        self.assertIsNone(self.read_original_date(image_path))
+
+    def test_median_is_interpolated_within_its_bin(self):
+        single_bin = np.zeros(256)
+        single_bin[25] = 100
+        # 30 pixels below bin 26 and 40 in it, so the middle pixel sits three quarters into bin 26
+        two_bins = np.zeros(256)
+        two_bins[10] = 30
+        two_bins[26] = 40
+        two_bins[200] = 50
+        medians = PillowImageEngine.medians_from_histograms([single_bin, two_bins])
+        self.assertAlmostEqual(medians[0], 25 / 255)
+        self.assertAlmostEqual(medians[1], (26 - 0.5 + 0.75) / 255)
+
+    def test_histogram_median_matches_exact_median(self):
+        gray_values = np.random.default_rng(0).normal(30, 8, (64, 64)).clip(0, 255).round().astype(np.uint8)
+        image = Image.fromarray(np.dstack([gray_values] * 3))
+        median = PillowImageEngine.medians_from_histograms([self.pillow_image_engine.gray_histogram(image)])[0]
+        self.assertAlmostEqual(median, np.median(gray_values) / 255, delta=0.5 / 255)
@@ -0,0 +1,125 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from services.ingest_service import IngestService
+from utils.constants import image_extensions, video_extensions
+
+SOURCE_FILES = [
+    'DSC_0001.JPG',
+    'DSC_0002.nef',
+    'notes.txt',
+    'Thumbs.db',
+    '._DSC_0001.JPG',
+    os.path.join('day 1', 'CWR_0001.MOV'),
+    os.path.join('day 1', 'CWR_0002.jpg'),
+    os.path.join('day 1', 'empty', 'no_extension'),
+    os.path.join('day 2', 'deeper', 'CWR_0003.mp4'),
+    os.path.join('day 2', 'deeper', 'CWR_0004.png'),
+    os.path.join('day 2', '.DS_Store'),
+]
+
+
+def walk_files(source_dir, extensions):
+    # What get_files did before the inventory, kept here as the baseline the inventory has to match
+    found_files = []
+    for root, dirs, filenames in os.walk(source_dir):
+        for filename in filenames:
+            if any([filename.lower().startswith(ignore) for ignore in IngestService.IGNORE_LIST]):
+                continue
+            file_extension = os.path.splitext(filename)[1]
+            if file_extension:
+                file_extension = file_extension.lower()
+            if file_extension in extensions:
+                found_files.append(os.path.join(root, filename))
+    return found_files
+
+
+class TestIngestInventory(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.source_dir = self.temp_dir.name
+        for relative_path in SOURCE_FILES:
+            self.add_file(relative_path)
+        # Skips __init__, which needs exiftool.exe, ffprobe.exe and the database
+        self.ingest_service = IngestService.__new__(IngestService)
+        self.ingest_service.validator_service = mock.Mock()
+        self.ingest_service.validator_service.validate_year_for_source.return_value = None
+        IngestService._inventories.clear()
+
+    def tearDown(self):
+        IngestService._inventories.clear()
+        self.temp_dir.cleanup()
+
+    def add_file(self, relative_path):
+        file_path = os.path.join(self.source_dir, relative_path)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, 'wb') as file_handle:
+            file_handle.write(b'')
+        return file_path
+
+    def age_inventory(self, seconds):
+        for inventory in IngestService._inventories.values():
+            inventory.created_at -= seconds
+
+    def test_inventory_matches_os_walk(self):
+        for extensions in (image_extensions, video_extensions):
+            self.assertEqual(
+                self.ingest_service.get_files(self.source_dir, extensions),
+                walk_files(self.source_dir, extensions),
+            )
+
+    def test_count_media_matches_os_walk(self):
+        media_count = self.ingest_service.count_media(self.source_dir)
+        self.assertEqual(media_count, {
+            'images': len(walk_files(self.source_dir, image_extensions)),
+            'videos': len(walk_files(self.source_dir, video_extensions)),
+            'error': None,
+        })
+        self.assertEqual((media_count['images'], media_count['videos']), (4, 2))
+
+    @unittest.skipUnless(hasattr(os, 'symlink'), 'needs symlinks')
+    def test_symlinked_folders_are_not_followed(self):
+        linked_dir = os.path.join(self.source_dir, 'linked')
+        try:
+            os.symlink(os.path.join(self.source_dir, 'day 1'), linked_dir, target_is_directory=True)
+        except OSError:
+            self.skipTest('not allowed to create symlinks')
+        self.assertEqual(
+            self.ingest_service.get_files(self.source_dir, image_extensions),
+            walk_files(self.source_dir, image_extensions),
+        )
+
+    def test_inventory_is_reused_within_ttl(self):
+        with mock.patch.object(self.ingest_service, 'build_inventory', wraps=self.ingest_service.build_inventory) as build:
+            first_files = self.ingest_service.get_files(self.source_dir, image_extensions)
+            self.add_file('DSC_0005.jpg')
+            self.age_inventory(IngestService.INVENTORY_TTL_SEC - 1)
+            self.assertEqual(self.ingest_service.get_files(self.source_dir, image_extensions), first_files)
+            self.assertEqual(build.call_count, 1)
+
+    def test_inventory_is_rebuilt_after_ttl(self):
+        with mock.patch.object(self.ingest_service, 'build_inventory', wraps=self.ingest_service.build_inventory) as build:
+            self.ingest_service.get_files(self.source_dir, image_extensions)
+            new_file = self.add_file('DSC_0005.jpg')
+            self.age_inventory(IngestService.INVENTORY_TTL_SEC + 1)
+            self.assertIn(new_file, self.ingest_service.get_files(self.source_dir, image_extensions))
+            self.assertEqual(build.call_count, 2)
+
+    def test_expired_inventories_are_dropped(self):
+        other_dir = os.path.join(self.source_dir, 'day 2')
+        self.ingest_service.get_files(other_dir, image_extensions)
+        self.age_inventory(IngestService.INVENTORY_TTL_SEC + 1)
+        self.ingest_service.get_files(self.source_dir, image_extensions)
+        self.assertEqual(list(IngestService._inventories), [os.path.normcase(os.path.abspath(self.source_dir))])
+
+    def test_count_media_always_walks_again(self):
+        self.ingest_service.get_files(self.source_dir, video_extensions)
+        self.add_file(os.path.join('day 1', 'CWR_0005.mov'))
+        self.assertEqual(self.ingest_service.count_media(self.source_dir)['videos'], 3)
+        # parse_media right after the count reuses the inventory the count just built
+        with mock.patch.object(self.ingest_service, 'build_inventory') as build:
+            self.assertEqual(len(self.ingest_service.get_files(self.source_dir, video_extensions)), 3)
+            build.assert_not_called()
@@ -0,0 +1,173 @@
+import hashlib
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from utils import file_path
+from utils.file_path import CopyProgress, copy_file_chunked, copy_folder_chunked, copy_file_fanout
+
+
+def write_file(path, contents):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as file_handle:
+        file_handle.write(contents)
+    return path
+
+
+def read_tree(folder):
+    tree = {}
+    for dirpath, _, filenames in os.walk(folder):
+        for filename in filenames:
+            full_path = os.path.join(dirpath, filename)
+            with open(full_path, 'rb') as file_handle:
+                tree[os.path.relpath(full_path, folder)] = file_handle.read()
+    return tree
+
+
+class TestCopyProgress(unittest.TestCase):
+
+    def test_progress_within_bounds(self):
+        reported = []
+        copy_progress = CopyProgress(200, (10, 50), reported.append)
+        copy_progress.add(100)
+        copy_progress.add(100)
+        self.assertEqual(reported, [30, 50])
+
+    def test_progress_never_passes_upper_bound(self):
+        reported = []
+        copy_progress = CopyProgress(100, (0, 100), reported.append)
+        copy_progress.add(150)
+        self.assertEqual(reported, [100])
+
+
+class TestCopyFileChunked(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_reports_every_chunk(self):
+        contents = os.urandom(2500)
+        source_file = write_file(os.path.join(self.temp_dir.name, 'source', 'image.jpg'), contents)
+        dest_folder = os.path.join(self.temp_dir.name, 'dest')
+        os.makedirs(dest_folder)
+        chunks = []
+        with mock.patch.object(file_path, 'COPY_CHUNK_BYTES', 1000):
+            dest_file = copy_file_chunked(source_file, dest_folder, chunks.append)
+        self.assertEqual(dest_file, os.path.join(dest_folder, 'image.jpg'))
+        self.assertEqual(chunks, [1000, 1000, 500])
+        with open(dest_file, 'rb') as file_handle:
+            self.assertEqual(file_handle.read(), contents)
+        self.assertEqual(os.stat(dest_file).st_mtime_ns, os.stat(source_file).st_mtime_ns)
+
+
+class TestCopyFolderChunked(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.source_folder = os.path.join(self.temp_dir.name, 'source')
+        self.dest_folder = os.path.join(self.temp_dir.name, 'dest')
+        write_file(os.path.join(self.source_folder, 'a.m4s'), os.urandom(300))
+        write_file(os.path.join(self.source_folder, 'nested', 'b.m4s'), os.urandom(700))
+        write_file(os.path.join(self.source_folder, 'nested', 'deeper', 'c.m4s'), b'')
+        write_file(os.path.join(self.source_folder, 'manifest.mpd'), b'<MPD/>')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_recreates_tree(self):
+        copied_bytes = []
+        self.assertEqual(copy_folder_chunked(self.source_folder, self.dest_folder, copied_bytes.append), self.dest_folder)
+        self.assertEqual(read_tree(self.dest_folder), read_tree(self.source_folder))
+        self.assertEqual(sum(copied_bytes), 300 + 700 + len(b'<MPD/>'))
+
+    def test_parallel_copy_publishes_manifest_last(self):
+        copied_files = []
+        real_copy_file_chunked = file_path.copy_file_chunked
+        def record_copy(source_file, dest_file, on_bytes_copied=None):
+            copied_files.append(os.path.basename(dest_file))
+            return real_copy_file_chunked(source_file, dest_file, on_bytes_copied)
+        with mock.patch.object(file_path, 'copy_file_chunked', side_effect=record_copy):
+            copy_folder_chunked(self.source_folder, self.dest_folder, max_workers=4, copy_last_extensions=('.mpd',))
+        self.assertEqual(read_tree(self.dest_folder), read_tree(self.source_folder))
+        self.assertEqual(copied_files[-1], 'manifest.mpd')
+        self.assertEqual(sorted(copied_files[:-1]), ['a.m4s', 'b.m4s', 'c.m4s'])
+
+    def test_failure_skips_manifest(self):
+        def fail_copy(source_file, dest_file, on_bytes_copied=None):
+            raise OSError('share went away')
+        with mock.patch.object(file_path, 'copy_file_chunked', side_effect=fail_copy):
+            with self.assertRaises(OSError):
+                copy_folder_chunked(self.source_folder, self.dest_folder, max_workers=2, copy_last_extensions=('.mpd',))
+        self.assertFalse(os.path.exists(os.path.join(self.dest_folder, 'manifest.mpd')))
+
+    def test_skip_existing_resumes(self):
+        copy_folder_chunked(self.source_folder, self.dest_folder)
+        # A segment cut short by an earlier failure has the wrong size, so it is copied again
+        write_file(os.path.join(self.dest_folder, 'nested', 'b.m4s'), b'partial')
+        copied_files = []
+        copied_bytes = []
+        real_copy_file_chunked = file_path.copy_file_chunked
+        def record_copy(source_file, dest_file, on_bytes_copied=None):
+            copied_files.append(os.path.basename(dest_file))
+            return real_copy_file_chunked(source_file, dest_file, on_bytes_copied)
+        with mock.patch.object(file_path, 'copy_file_chunked', side_effect=record_copy):
+            copy_folder_chunked(
+                self.source_folder, self.dest_folder, copied_bytes.append,
+                copy_last_extensions=('.mpd',), skip_existing=True,
+            )
+        self.assertEqual(sorted(copied_files), ['b.m4s', 'manifest.mpd'])
+        self.assertEqual(read_tree(self.dest_folder), read_tree(self.source_folder))
+        self.assertEqual(sum(copied_bytes), 300 + 700 + len(b'<MPD/>'))
+
+
+class TestCopyFileFanout(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.contents = os.urandom(2500)
+        self.source_file = write_file(os.path.join(self.temp_dir.name, 'source', 'image.jpg'), self.contents)
+        self.dest_folders = []
+        for dest_name in ('local', 'network'):
+            dest_folder = os.path.join(self.temp_dir.name, dest_name)
+            os.makedirs(dest_folder)
+            self.dest_folders.append(dest_folder)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def assert_copied(self, dest_folder):
+        with open(os.path.join(dest_folder, 'image.jpg'), 'rb') as file_handle:
+            self.assertEqual(file_handle.read(), self.contents)
+
+    def test_writes_every_destination_from_one_read(self):
+        reported = []
+        copy_progress = CopyProgress(len(self.contents), (0, 100), reported.append)
+        with mock.patch.object(file_path, 'COPY_CHUNK_BYTES', 1000):
+            checksum = copy_file_fanout(self.source_file, self.dest_folders, copy_progress=copy_progress)
+        self.assertEqual(checksum, hashlib.sha256(self.contents).hexdigest())
+        for dest_folder in self.dest_folders:
+            self.assert_copied(dest_folder)
+        self.assertEqual(reported, [40, 80, 100])
+
+    def test_failed_destination_is_retried_alone(self):
+        real_open = open
+        failing_dest_file = os.path.join(self.dest_folders[1], 'image.jpg')
+        opened_dest_files = []
+        def flaky_open(path, mode='r', *args, **kwargs):
+            if mode == 'wb':
+                opened_dest_files.append(path)
+                if path == failing_dest_file and opened_dest_files.count(path) == 1:
+                    raise PermissionError('share is busy')
+            return real_open(path, mode, *args, **kwargs)
+        with mock.patch('builtins.open', side_effect=flaky_open), mock.patch.object(file_path, 'RETRY_DELAY_SEC', 0):
+            checksum = copy_file_fanout(self.source_file, self.dest_folders)
+        self.assertEqual(checksum, hashlib.sha256(self.contents).hexdigest())
+        for dest_folder in self.dest_folders:
+            self.assert_copied(dest_folder)
+        # The working destination is only written by the shared pass
+        self.assertEqual(opened_dest_files.count(os.path.join(self.dest_folders[0], 'image.jpg')), 1)
+        self.assertEqual(opened_dest_files.count(failing_dest_file), 2)
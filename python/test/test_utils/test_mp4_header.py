@@ -0,0 +1,141 @@
+import os
+import struct
+import tempfile
+import unittest
+from unittest import mock
+
+from utils.mp4_header import read_mp4_video_stream, Mp4HeaderError, MP4_EPOCH_OFFSET
+from services.video_metadata_service import VideoMetadataService
+
+# 2020-09-13T12:26:40Z
+CREATION_TIME = MP4_EPOCH_OFFSET + 1600000000
+
+
+def box(box_type, payload):
+    return struct.pack('>I4s', 8 + len(payload), box_type) + payload
+
+
+def large_box(box_type, payload):
+    # A size of 1 moves the real size into a 64-bit largesize field after the type
+    return struct.pack('>I4sQ', 1, box_type, 16 + len(payload)) + payload
+
+
+def full_box(box_type, version, payload):
+    return box(box_type, bytes([version, 0, 0, 0]) + payload)
+
+
+def mvhd(version):
+    if version == 1:
+        times = struct.pack('>QQIQ', CREATION_TIME, CREATION_TIME, 1000, 10010)
+    else:
+        times = struct.pack('>IIII', CREATION_TIME, CREATION_TIME, 1000, 10010)
+    # rate, volume, reserved, matrix, pre-defined, next track id
+    return full_box(b'mvhd', version, times + struct.pack('>IH10x36x24xI', 0x00010000, 0x0100, 2))
+
+
+def tkhd(version):
+    if version == 1:
+        times = struct.pack('>QQI4xQ', CREATION_TIME, CREATION_TIME, 1, 10010)
+    else:
+        times = struct.pack('>III4xI', CREATION_TIME, CREATION_TIME, 1, 10010)
+    # reserved, layer, alternate group, volume, reserved, matrix, then width and height as 16.16 fixed point
+    return full_box(b'tkhd', version, times + struct.pack('>8xHHH2x36xII', 0, 0, 0, 1920 << 16, 1080 << 16))
+
+
+def mdhd(version, timescale=30000, duration=300 * 1001):
+    if version == 1:
+        times = struct.pack('>QQIQ', CREATION_TIME, CREATION_TIME, timescale, duration)
+    else:
+        times = struct.pack('>IIII', CREATION_TIME, CREATION_TIME, timescale, duration)
+    return full_box(b'mdhd', version, times + struct.pack('>HH', 0x55c4, 0))
+
+
+def hdlr(handler_type):
+    return full_box(b'hdlr', 0, struct.pack('>I4s12x', 0, handler_type) + b'handler\x00')
+
+
+def stbl(width=1920, height=1080, sample_count=300, sample_delta=1001):
+    # reserved, data reference index, pre-defined, width, height, resolutions, reserved, frame count, compressor, depth
+    visual_entry = box(b'avc1', struct.pack(
+        '>6xH16xHHII4xH32sHh', 1, width, height, 0x00480000, 0x00480000, 1, b'', 0x18, -1
+    ))
+    stsd = full_box(b'stsd', 0, struct.pack('>I', 1) + visual_entry)
+    stts = full_box(b'stts', 0, struct.pack('>III', 1, sample_count, sample_delta))
+    stsz = full_box(b'stsz', 0, struct.pack('>II', 4096, sample_count))
+    return box(b'stbl', stsd + stts + stsz)
+
+
+def trak(header_version, handler_type=b'vide'):
+    mdia = box(b'mdia', mdhd(header_version) + hdlr(handler_type) + box(b'minf', stbl()))
+    return box(b'trak', tkhd(header_version) + mdia)
+
+
+def moov(header_version, box_function=box):
+    return box_function(b'moov', mvhd(header_version) + trak(header_version, b'soun') + trak(header_version))
+
+
+FTYP = box(b'ftyp', b'isom' + struct.pack('>I', 512) + b'isomavc1')
+MDAT = box(b'mdat', b'\x00' * 4096)
+
+EXPECTED_STREAM = {
+    'width': 1920,
+    'height': 1080,
+    'duration': '10.010000',
+    'r_frame_rate': '30000/1001',
+    'nb_frames': '300',
+    'tags': {'creation_time': '2020-09-13T12:26:40.000000Z'},
+}
+
+
+class TestMp4Header(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write_video(self, contents, file_name='video.mp4'):
+        video_path = os.path.join(self.temp_dir.name, file_name)
+        with open(video_path, 'wb') as video_file:
+            video_file.write(contents)
+        return video_path
+
+    def test_version_0_headers(self):
+        video_path = self.write_video(FTYP + moov(0) + MDAT)
+        self.assertEqual(read_mp4_video_stream(video_path), EXPECTED_STREAM)
+
+    def test_version_1_headers(self):
+        video_path = self.write_video(FTYP + moov(1) + MDAT)
+        self.assertEqual(read_mp4_video_stream(video_path), EXPECTED_STREAM)
+
+    def test_largesize_boxes(self):
+        video_path = self.write_video(FTYP + large_box(b'mdat', b'\x00' * 4096) + moov(0, large_box))
+        self.assertEqual(read_mp4_video_stream(video_path), EXPECTED_STREAM)
+
+    def test_moov_after_mdat(self):
+        video_path = self.write_video(FTYP + MDAT + moov(1))
+        self.assertEqual(read_mp4_video_stream(video_path), EXPECTED_STREAM)
+
+    def test_no_video_track(self):
+        audio_only_moov = box(b'moov', mvhd(0) + trak(0, b'soun'))
+        video_path = self.write_video(FTYP + audio_only_moov + MDAT)
+        with self.assertRaises(Mp4HeaderError):
+            read_mp4_video_stream(video_path)
+
+    def test_truncated_file(self):
+        video_path = self.write_video((FTYP + MDAT + moov(0))[:-100])
+        with self.assertRaises(Mp4HeaderError):
+            read_mp4_video_stream(video_path)
+
+    def test_truncated_file_falls_back_to_ffprobe(self):
+        video_path = self.write_video((FTYP + MDAT + moov(0))[:-100], 'truncated.mov')
+        # Skips __init__, which needs ffprobe.exe and the database
+        video_metadata_service = VideoMetadataService.__new__(VideoMetadataService)
+        video_metadata_service.metadata_cache_service = mock.Mock()
+        video_metadata_service.metadata_cache_service.lookup.return_value = {}
+        ffprobe_metadata = mock.Mock(name='ffprobe metadata')
+        with mock.patch.object(video_metadata_service, 'ffprobe_metadata', return_value=ffprobe_metadata) as ffprobe:
+            self.assertIsNone(video_metadata_service.read_native_metadata(video_path))
+            self.assertIs(video_metadata_service.parse_metadata(video_path), ffprobe_metadata)
+            ffprobe.assert_called_once_with(video_path, None)
@@ -2,8 +2,10 @@ import os
 import shutil
 
 from services.transcode_service import TranscodeService
+from services.task_service import TaskService
 
 transcode_service = TranscodeService()
+task_service = TaskService()
 
 def cleanup_sample_dir():
     sample_image_dir = transcode_service.get_sample_image_dir()
@@ -11,6 +13,10 @@ def cleanup_sample_dir():
         return
     shutil.rmtree(sample_image_dir)
 
+def cleanup_task_checkpoints():
+    task_service.delete_orphaned_checkpoints()
+
 # List out each task as a method-call here
 def init_cleanup_tasks():
     cleanup_sample_dir()
+    cleanup_task_checkpoints()
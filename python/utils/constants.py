@@ -196,3 +196,35 @@ image_extensions = [
 video_extensions_optimized = ['.m4s', '.mpd', '.mp4']
 video_extensions_countable = ['.mpd']
 image_extensions_optimized = ['.jpg']
+
+# Camera RAW formats from image_extensions. These usually carry an embedded full or reduced size JPEG preview
+raw_image_extensions = [
+    '.3fr',
+    '.arw',
+    '.cr2',
+    '.cr3',
+    '.crw',
+    '.dcr',
+    '.dng',
+    '.erf',
+    '.fff',
+    '.iiq',
+    '.k25',
+    '.kdc',
+    '.mdc',
+    '.mef',
+    '.mos',
+    '.mrw',
+    '.nef',
+    '.nrw',
+    '.orf',
+    '.pef',
+    '.raf',
+    '.raw',
+    '.rw2',
+    '.rwl',
+    '.sr2',
+    '.srf',
+    '.srw',
+    '.x3f',
+]
@@ -1,13 +1,21 @@
+import threading
+
 terminators = []
+terminators_lock = threading.Lock()
 
 def add_terminator(child):
-    terminators.append(child)
+    with terminators_lock:
+        terminators.append(child)
 
 def get_terminators():
-    return terminators
+    with terminators_lock:
+        return list(terminators)
 
-def remove_last_terminator():
-    del terminators[-1]
+def remove_terminator(child):
+    # Several subprocesses can be running at once, so remove the exact one that finished
+    with terminators_lock:
+        if child in terminators:
+            terminators.remove(child)
 
 def terminate_all():
     for terminator in get_terminators():
@@ -1,8 +1,11 @@
 import math
 import os
+import hashlib
 import shutil
 import re
 import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 from settings.settings_service import SettingsService
@@ -16,6 +19,8 @@ folder_model = FolderModel()
 video_model = VideoModel()
 
 RETRY_DELAY_SEC = 1
+FINGERPRINT_SAMPLE_BYTES = 64 * 1024
+COPY_CHUNK_BYTES = 8 * 1024 * 1024
 
 
 # Ensure this method matches the method on the frontend (safeObserverCode)
@@ -98,17 +103,184 @@ def get_size_of_folder_contents_recursively(folder_path):
         return 1 # prevent division by zero
     return total_size
 
-def copy_file_with_attempts(source_file, dest_folder, num_attempts=3):
+def fingerprint_file(file_path):
+    # A cheap stand-in for hashing the whole file: its size, its mtime and a hash of a few sampled blocks.
+    # Reading only the start, middle and end keeps this fast even for multi-GB videos on a network share
+    file_stat = os.stat(file_path)
+    file_size = file_stat.st_size
+    sample_hash = hashlib.blake2b(digest_size=16)
+    with open(file_path, 'rb') as file_handle:
+        for offset in (0, file_size // 2, max(0, file_size - FINGERPRINT_SAMPLE_BYTES)):
+            file_handle.seek(offset)
+            sample_hash.update(file_handle.read(FINGERPRINT_SAMPLE_BYTES))
+    return f'{file_size}-{file_stat.st_mtime_ns}-{sample_hash.hexdigest()}'
+
+class CopyProgress:
+    # Counts the bytes written by the chunked copies below and turns them into a progress value within
+    # progress_bounds. Progress is derived from what was written, so the destination never has to be stat'd
+    def __init__(self, total_bytes, progress_bounds=(0, 100), report_progress=None):
+        self.total_bytes = max(total_bytes, 1)
+        self.progress_bounds = progress_bounds
+        self.report_progress = report_progress
+        self.bytes_copied = 0
+        self.lock = threading.Lock()
+
+    def add(self, num_bytes):
+        with self.lock:
+            self.bytes_copied += num_bytes
+            progress = int(
+                (min(self.bytes_copied, self.total_bytes) / self.total_bytes)
+                * (self.progress_bounds[1] - self.progress_bounds[0])
+                + self.progress_bounds[0]
+            )
+        if self.report_progress:
+            self.report_progress(progress)
+
+def copy_file_chunked(source_file, dest_file, on_bytes_copied=None, preserve_metadata=True, checksum=None):
+    # Large sequential reads and writes keep round trips to a network share low, and every written chunk is
+    # reported to on_bytes_copied. Like shutil.copy/copy2, dest_file may be a folder to copy into.
+    # A hashlib object passed as checksum is fed the same chunks, so hashing costs no extra read
+    if os.path.isdir(dest_file):
+        dest_file = os.path.join(dest_file, os.path.basename(source_file))
+    buffer = bytearray(COPY_CHUNK_BYTES)
+    view = memoryview(buffer)
+    with open(source_file, 'rb') as source_handle, open(dest_file, 'wb') as dest_handle:
+        while True:
+            num_read = source_handle.readinto(buffer)
+            if not num_read:
+                break
+            dest_handle.write(view[:num_read])
+            if checksum:
+                checksum.update(view[:num_read])
+            if on_bytes_copied:
+                on_bytes_copied(num_read)
+    if preserve_metadata:
+        shutil.copystat(source_file, dest_file)
+    else:
+        shutil.copymode(source_file, dest_file)
+    return dest_file
+
+def copy_folder_chunked(source_folder, dest_folder, on_bytes_copied=None, max_workers=1, copy_last_extensions=(), skip_existing=False):
+    # Recreates source_folder at dest_folder, copying up to max_workers files at once with copy_file_chunked.
+    # Files ending in copy_last_extensions are only copied once every other file is in place.
+    # With skip_existing, files already at the destination with the same size are kept, so a retry resumes
+    copy_first, copy_last = [], []
+    for dirpath, dirnames, filenames in os.walk(source_folder):
+        relative_dir = os.path.relpath(dirpath, source_folder)
+        dest_dir = os.path.normpath(os.path.join(dest_folder, relative_dir))
+        os.makedirs(dest_dir, exist_ok=True)
+        for filename in filenames:
+            file_pair = (os.path.join(dirpath, filename), os.path.join(dest_dir, filename))
+            if filename.lower().endswith(copy_last_extensions):
+                copy_last.append(file_pair)
+            else:
+                copy_first.append(file_pair)
+
+    def copy_one(file_pair):
+        source_file, dest_file = file_pair
+        if skip_existing and not dest_file.lower().endswith(copy_last_extensions):
+            source_size = os.path.getsize(source_file)
+            if os.path.isfile(dest_file) and os.path.getsize(dest_file) == source_size:
+                if on_bytes_copied:
+                    on_bytes_copied(source_size)
+                return
+        copy_file_chunked(source_file, dest_file, on_bytes_copied)
+
+    for file_pairs in (copy_first, copy_last):
+        if not file_pairs:
+            continue
+        executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(file_pairs))))
+        try:
+            for _ in executor.map(copy_one, file_pairs):
+                pass
+        finally:
+            # On the first failure, files that have not started yet are dropped instead of being copied for nothing
+            executor.shutdown(wait=True, cancel_futures=True)
+    return dest_folder
+
+def copy_file_with_attempts(source_file, dest_folder, num_attempts=3, copy_progress=None):
+    # Returns the sha256 of the copied bytes
     print_out(f'Copying {source_file} into {dest_folder}')
     for i in range(num_attempts):
+        bytes_this_attempt = [0]
+        checksum = hashlib.sha256()
+        def on_bytes_copied(num_bytes):
+            bytes_this_attempt[0] += num_bytes
+            if copy_progress:
+                copy_progress.add(num_bytes)
         try:
-            if (i + 1) == num_attempts:
-                # On final attempt, try just `copy` in case `copy2` is causing the issue
-                shutil.copy(source_file, dest_folder)
-            else:
-                shutil.copy2(source_file, dest_folder)
-            return
+            # On final attempt, skip copying the file metadata in case that is causing the issue
+            is_final_attempt = (i + 1) == num_attempts
+            copy_file_chunked(source_file, dest_folder, on_bytes_copied, preserve_metadata=not is_final_attempt, checksum=checksum)
+            return checksum.hexdigest()
         except Exception as e:
             print_err(f"Attempt {i + 1} failed: {e}")
+            if copy_progress:
+                # The next attempt starts over, so the bytes of the failed one no longer count
+                copy_progress.add(-bytes_this_attempt[0])
             time.sleep(RETRY_DELAY_SEC)
     raise Exception(f"Failed to copy file from {source_file} to {dest_folder} after {num_attempts} attempts")
+
+def copy_file_fanout(source_file, dest_folders, num_attempts=3, copy_progress=None):
+    # Reads source_file once and writes every chunk to all destinations. A destination that fails is dropped from
+    # the shared pass and then retried on its own with copy_file_with_attempts, so it can't fail the others.
+    # Returns the sha256 of the source bytes
+    print_out(f'Copying {source_file} into {", ".join(dest_folders)}')
+    dest_files = [
+        os.path.join(dest_folder, os.path.basename(source_file)) if os.path.isdir(dest_folder) else dest_folder
+        for dest_folder in dest_folders
+    ]
+    failed_dest_folders = []
+    dest_handles = {}
+    checksum = hashlib.sha256()
+    try:
+        for dest_folder, dest_file in zip(dest_folders, dest_files):
+            try:
+                dest_handles[dest_folder] = open(dest_file, 'wb')
+            except Exception as e:
+                print_err(f'Could not open {dest_file}: {e}')
+                failed_dest_folders.append(dest_folder)
+
+        buffer = bytearray(COPY_CHUNK_BYTES)
+        view = memoryview(buffer)
+        with open(source_file, 'rb') as source_handle:
+            while dest_handles:
+                num_read = source_handle.readinto(buffer)
+                if not num_read:
+                    break
+                checksum.update(view[:num_read])
+                for dest_folder, dest_handle in list(dest_handles.items()):
+                    try:
+                        dest_handle.write(view[:num_read])
+                    except Exception as e:
+                        print_err(f'Copy into {dest_folder} failed: {e}')
+                        dest_handle.close()
+                        del dest_handles[dest_folder]
+                        failed_dest_folders.append(dest_folder)
+                if copy_progress:
+                    copy_progress.add(num_read)
+
+        for dest_folder, dest_file in zip(dest_folders, dest_files):
+            if dest_folder not in dest_handles:
+                continue
+            try:
+                dest_handles.pop(dest_folder).close()
+                shutil.copystat(source_file, dest_file)
+            except Exception as e:
+                print_err(f'Copy into {dest_folder} failed: {e}')
+                failed_dest_folders.append(dest_folder)
+    except Exception as e:
+        # Reading the source failed, so none of the destinations can be trusted
+        print_err(f'Reading {source_file} failed: {e}')
+        failed_dest_folders = list(dest_folders)
+        checksum = None
+    finally:
+        for dest_handle in dest_handles.values():
+            dest_handle.close()
+
+    checksum_hexdigest = checksum.hexdigest() if checksum else None
+    for dest_folder in failed_dest_folders:
+        retry_checksum_hexdigest = copy_file_with_attempts(source_file, dest_folder, max(1, num_attempts - 1))
+        checksum_hexdigest = checksum_hexdigest or retry_checksum_hexdigest
+    return checksum_hexdigest
+
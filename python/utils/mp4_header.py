@@ -0,0 +1,140 @@
+import os
+import math
+import struct
+from datetime import datetime, timezone
+
+# Reads what ffprobe -show_streams reports for the first video stream of an MP4 or MOV file straight from the
+# boxes of its moov box. Only box headers and the few boxes needed are read, seeking past everything else
+
+mp4_extensions = ['.mp4', '.m4v', '.mov']
+
+# Seconds between the MP4 epoch, 1904-01-01, and the Unix epoch
+MP4_EPOCH_OFFSET = 2082844800
+
+# More distinct runs of frame durations than this can't be a constant frame rate, so the table isn't even read
+MAX_STTS_ENTRIES = 16
+
+
+class Mp4HeaderError(ValueError):
+    pass
+
+
+def iter_boxes(file, start, end):
+    # Yields (box_type, payload_start, payload_end) for every box between start and end
+    position = start
+    while position + 8 <= end:
+        file.seek(position)
+        size, box_type = struct.unpack('>I4s', file.read(8))
+        header_size = 8
+        if size == 1:
+            size = struct.unpack('>Q', file.read(8))[0]
+            header_size = 16
+        elif size == 0:
+            size = end - position
+        if size < header_size or position + size > end:
+            raise Mp4HeaderError(f'Malformed {box_type!r} box at {position}')
+        yield box_type, position + header_size, position + size
+        position += size
+
+
+def find_box(file, start, end, box_type):
+    for found_type, payload_start, payload_end in iter_boxes(file, start, end):
+        if found_type == box_type:
+            return payload_start, payload_end
+    return None
+
+
+def read_payload(file, box, num_bytes):
+    payload_start, payload_end = box
+    if payload_end - payload_start < num_bytes:
+        raise Mp4HeaderError('Truncated box')
+    file.seek(payload_start)
+    return file.read(num_bytes)
+
+
+def read_mp4_video_stream(video_path):
+    # Returns a dict with the same keys and formats as an ffprobe stream, or raises Mp4HeaderError
+    with open(video_path, 'rb') as file:
+        file_size = os.fstat(file.fileno()).st_size
+        moov = find_box(file, 0, file_size, b'moov')
+        if not moov:
+            raise Mp4HeaderError('No moov box')
+
+        for box_type, trak_start, trak_end in iter_boxes(file, *moov):
+            if box_type != b'trak':
+                continue
+            mdia = find_box(file, trak_start, trak_end, b'mdia')
+            if not mdia:
+                continue
+            hdlr = find_box(file, *mdia, b'hdlr')
+            if not hdlr or read_payload(file, hdlr, 12)[8:12] != b'vide':
+                continue
+            return read_video_track(file, mdia)
+    raise Mp4HeaderError('No video track')
+
+
+def read_video_track(file, mdia):
+    mdhd = find_box(file, *mdia, b'mdhd')
+    minf = find_box(file, *mdia, b'minf')
+    stbl = minf and find_box(file, *minf, b'stbl')
+    if not mdhd or not stbl:
+        raise Mp4HeaderError('Incomplete video track')
+
+    version = read_payload(file, mdhd, 1)[0]
+    if version == 1:
+        creation_time, _, timescale, duration = struct.unpack('>QQIQ', read_payload(file, mdhd, 32)[4:32])
+    else:
+        creation_time, _, timescale, duration = struct.unpack('>IIII', read_payload(file, mdhd, 20)[4:20])
+
+    stsd = find_box(file, *stbl, b'stsd')
+    if not stsd:
+        raise Mp4HeaderError('No sample description')
+    # The first visual sample entry: box header, 6 reserved, data reference index, 16 pre-defined, width, height
+    width, height = struct.unpack('>HH', read_payload(file, stsd, 44)[40:44])
+
+    stts = find_box(file, *stbl, b'stts')
+    if not stts:
+        raise Mp4HeaderError('No decoding times')
+    entry_count = struct.unpack('>I', read_payload(file, stts, 8)[4:8])[0]
+    if entry_count > MAX_STTS_ENTRIES:
+        raise Mp4HeaderError('Variable frame rate')
+    stts_entries = read_payload(file, stts, 8 + 8 * entry_count)[8:]
+    sample_deltas = [struct.unpack_from('>II', stts_entries, 8 * index) for index in range(entry_count)]
+    if not sample_deltas:
+        # e.g. fragmented files, which keep their samples in moof boxes instead
+        raise Mp4HeaderError('No samples in the moov box')
+    # Cameras often give the very last frame a different duration, the rest has to be evenly spaced
+    if sample_deltas and sample_deltas[-1][0] == 1 and len(sample_deltas) > 1:
+        frame_deltas = {delta for _, delta in sample_deltas[:-1]}
+    else:
+        frame_deltas = {delta for _, delta in sample_deltas}
+    if len(frame_deltas) != 1:
+        raise Mp4HeaderError('Variable frame rate')
+    frame_delta = frame_deltas.pop()
+    stts_duration = sum(count * delta for count, delta in sample_deltas)
+
+    stsz = find_box(file, *stbl, b'stsz') or find_box(file, *stbl, b'stz2')
+    if not stsz:
+        raise Mp4HeaderError('No sample sizes')
+    sample_count = struct.unpack('>I', read_payload(file, stsz, 12)[8:12])[0]
+
+    # Like ffprobe, the stream lasts as long as the shorter of its header and its decoding times say
+    if stts_duration:
+        duration = min(duration, stts_duration) if duration else stts_duration
+    if not (timescale and duration and frame_delta and sample_count and width and height):
+        raise Mp4HeaderError('Incomplete video track')
+
+    divisor = math.gcd(timescale, frame_delta)
+    stream = {
+        'width': width,
+        'height': height,
+        'duration': f'{duration / timescale:.6f}',
+        'r_frame_rate': f'{timescale // divisor}/{frame_delta // divisor}',
+        'nb_frames': str(sample_count),
+        'tags': {},
+    }
+    if creation_time:
+        stream['tags']['creation_time'] = datetime.fromtimestamp(
+            creation_time - MP4_EPOCH_OFFSET, timezone.utc
+        ).strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+    return stream
@@ -37,7 +37,9 @@ const parse = async (mode, sourceFolder, observerCode) => {
   })
   return data?.job_id
 }
-const getJobResultData = (jobId) => getJSON(`${ingestURL}/job_data/${jobId}`)
+// Readable while the parse is still running: { items, offset, total, status, error }
+const getJobResultDataPage = (jobId, offset, limit = 500) =>
+  getJSON(`${ingestURL}/job_data/${jobId}/items?offset=${offset}&limit=${limit}`)
 
 const validatePathLengths = async (mode, sourceFolder, observerCode, filePaths) => {
   const { data } = await postJSONWithResponse(`${ingestURL}/validate_path_lengths/${mode}`, {
@@ -130,7 +132,7 @@ export default {
   cleanUpJobs,
   countFiles,
   parse,
-  getJobResultData,
+  getJobResultDataPage,
   validatePathLengths,
   validateNonExistence,
   getJobSampleData,
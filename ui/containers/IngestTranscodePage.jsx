@@ -63,33 +63,56 @@ const IngestTranscodePage = () => {
     setAllWarnings(new Map())
     setAllErrors(new Map())
     let intervalId
+    let isActive = true
+    let isFetching = false
+    const loadedMedia = []
 
     const checkForMetadata = async () => {
-      const { status, error } = await ingestAPI.jobStatus(jobId)
-      if (status === STATUSES.QUEUED) return
-      if (status === STATUSES.INCOMPLETE) {
-        if (error) {
-          setParseStatus(error)
-          clearInterval(intervalId)
+      // A slow poll must not overlap the next one, both would load the same page
+      if (isFetching) return
+      isFetching = true
+      try {
+        // Results are stored as they get parsed, so pages can be read while parsing still runs
+        const numLoadedBefore = loadedMedia.length
+        let page
+        do {
+          page = await ingestAPI.getJobResultDataPage(jobId, loadedMedia.length)
+          loadedMedia.push(...page.items.map(transformMediaMetadata))
+        } while (page.items.length > 0 && loadedMedia.length < page.total)
+        if (!isActive) return
+
+        if (loadedMedia.length > numLoadedBefore) {
+          const groupsAndAggregates = groupMediaMetadataBySubfolder(sourceFolder, loadedMedia)
+          setMediaGroups(groupsAndAggregates.mediaGroups)
+          setTotalSize(groupsAndAggregates.totalSize)
+          setAllWarnings(groupsAndAggregates.allWarnings)
+          setAllErrors(groupsAndAggregates.allErrors)
         }
-        return
-      }
 
-      // Status must be Completed at this point
-      clearInterval(intervalId)
+        // Each page reads the status before its items, so a completed job has nothing left to load
+        const { status, error } = page
+        if (status === STATUSES.QUEUED) return
+        if (status === STATUSES.INCOMPLETE) {
+          if (error) {
+            setParseStatus(error)
+            clearInterval(intervalId)
+          }
+          return
+        }
 
-      const data = await ingestAPI.getJobResultData(jobId)
-      const transformedData = data.map(transformMediaMetadata)
-      const groupsAndAggregates = groupMediaMetadataBySubfolder(sourceFolder, transformedData)
-      setMediaGroups(groupsAndAggregates.mediaGroups)
-      setTotalSize(groupsAndAggregates.totalSize)
-      setAllWarnings(groupsAndAggregates.allWarnings)
-      setAllErrors(groupsAndAggregates.allErrors)
-      setParseStatus(STATUSES.COMPLETED)
+        // Status must be Completed at this point
+        clearInterval(intervalId)
+        setParseStatus(STATUSES.COMPLETED)
+      } finally {
+        isFetching = false
+      }
     }
 
     intervalId = setInterval(checkForMetadata, 1000)
-    return () => clearInterval(intervalId)
+    return () => {
+      isActive = false
+      clearInterval(intervalId)
+    }
   }, [phase, jobId])
 
   /* Trigger Compression Options page - for images only */